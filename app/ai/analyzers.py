@@ -1,9 +1,48 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple
+import asyncio
+import heapq
+from itertools import chain, islice
 import logging
+import re
 from app.models.schemas import UserContext
 
 logger = logging.getLogger(__name__)
 
+# Actions that read data produced by earlier actions (get_odds reuses fixtures) and must run in order
+ORDERED_ACTIONS = ("get_fixtures", "get_odds")
+
+# Fixtures (and therefore odds) are always read for this sport
+DEFAULT_SPORT_ID = 1
+
+# Most fixtures the competitive analysis fetches odds for when a date narrows the list
+MAX_COMPETITIVE_FIXTURES = 20
+
+# Shared read-only default for nested .get() lookups; never mutate
+_EMPTY: Dict[str, Any] = {}
+
+# Keywords that identify each kind of odds query, most frequent first
+ODDS_INTENT_KEYWORDS = {
+    "recommendation": ("recommend", "best bet", "suggestion", "should i bet"),
+    "competitive": ("competitive", "close", "balanced", "tight"),
+    "favorite": ("favorite", "between", "favored"),
+}
+
+# Single pattern matching every keyword; the lookahead also reports overlapping keywords
+_ODDS_INTENT_RE = re.compile("(?=(?:{}))".format("|".join(
+    f"(?P<{intent}>{'|'.join(map(re.escape, keywords))})"
+    for intent, keywords in ODDS_INTENT_KEYWORDS.items()
+)))
+
+# Words that suggest a message will need fixtures or odds, beyond the odds intent keywords above
+SPORTS_DATA_KEYWORDS = (
+    "odds", "bet", "match", "game", "fixture", "play", "win", "vs", "score",
+    "today", "tomorrow", "weekend", "partido", "apuesta", "cuota",
+)
+
+_SPORTS_DATA_RE = re.compile(r"\b(?:{})".format("|".join(map(re.escape, chain(
+    SPORTS_DATA_KEYWORDS, *ODDS_INTENT_KEYWORDS.values()
+)))), re.IGNORECASE)
+
 class APIAnalyzer:
     """
     API analyzer for intelligent sports betting data processing and analysis.
@@ -21,6 +60,13 @@ class APIAnalyzer:
     def __init__(self, data_service, ensure_auth_callback):
         self.data_service = data_service
         self.ensure_auth_callback = ensure_auth_callback
+        
+        # Every handler takes (entities, api_data, context) and returns data to merge into api_data
+        self._action_handlers = {
+            "get_fixtures": self._get_fixtures,
+            "get_odds": self._get_odds,
+            "get_balance": self._get_balance,
+        }
 
     async def execute_api_actions(self, actions: List[str], entities: Dict, context: UserContext) -> Dict[str, Any]:
         api_data = {}
@@ -29,15 +75,21 @@ class APIAnalyzer:
         try:
             await self.ensure_auth_callback()
             
-            for action in actions:
-                if action == "get_fixtures":
-                    api_data.update(await self._get_fixtures(entities))
-                
-                elif action == "get_odds":
-                    api_data.update(await self._get_odds(entities, api_data, context))
-                
-                elif action == "get_balance":
-                    api_data.update(await self._get_balance())
+            async def run_in_order(ordered_actions: List[str]):
+                for action in ordered_actions:
+                    api_data.update(await self._action_handlers[action](entities, api_data, context))
+            
+            # Independent actions (e.g. balance) overlap with the fixtures -> odds chain
+            results = await asyncio.gather(
+                run_in_order([action for action in actions if action in ORDERED_ACTIONS]),
+                *(
+                    self._action_handlers[action](entities, api_data, context)
+                    for action in actions
+                    if action in self._action_handlers and action not in ORDERED_ACTIONS
+                )
+            )
+            for result in results[1:]:
+                api_data.update(result)
             
             return api_data
         
@@ -45,20 +97,13 @@ class APIAnalyzer:
             logger.error(f"Error executing API actions: {str(e)}")
             return {"error": f"Error accessing sports data: {str(e)}"}
 
-    async def _get_fixtures(self, entities: Dict) -> Dict[str, Any]:
-        fixtures = await self.data_service.get_fixtures_for_sport(sport_id=1)
-        
-        if entities.get("teams"):
-            filtered_fixtures = []
-            for team in entities["teams"]:
-                team_fixtures = self.data_service.find_team_in_fixtures(team, fixtures)
-                filtered_fixtures.extend(team_fixtures)
-            fixtures = filtered_fixtures
-        
-        if entities.get("dates"):
-            for date in entities["dates"]:
-                fixtures = self.data_service.find_fixtures_by_date(fixtures, date)
-        
+    async def _collect_fixtures(self, entities: Dict) -> List:
+        """Fixtures for sport 1 narrowed to the requested teams and dates"""
+        fixtures = await self.data_service.get_fixtures_for_sport(sport_id=DEFAULT_SPORT_ID)
+        return self.data_service.filter_fixtures(fixtures, entities)
+
+    async def _get_fixtures(self, entities: Dict, api_data: Dict, context: UserContext) -> Dict[str, Any]:
+        fixtures = await self._collect_fixtures(entities)
         return {"fixtures": fixtures[:10]}
 
     async def _get_odds(self, entities: Dict, api_data: Dict, context: UserContext) -> Dict[str, Any]:
@@ -66,36 +111,26 @@ class APIAnalyzer:
         
         if not fixtures:
             logger.info("Getting fixtures for odds calculation")
-            fixtures = await self.data_service.get_fixtures_for_sport(sport_id=1)
-            
-            if entities.get("teams"):
-                filtered_fixtures = []
-                for team in entities["teams"]:
-                    team_fixtures = self.data_service.find_team_in_fixtures(team, fixtures)
-                    filtered_fixtures.extend(team_fixtures)
-                fixtures = filtered_fixtures
-            
-            if entities.get("dates"):
-                for date in entities["dates"]:
-                    fixtures = self.data_service.find_fixtures_by_date(fixtures, date)
+            fixtures = await self._collect_fixtures(entities)
         
         if not fixtures:
             return {"odds": [], "error": "No fixtures found for the specified criteria"}
         
         message_lower = entities.get("_original_message", "").lower()
+        odds_intents = self._classify_odds_intent(message_lower)
         
-        if self._is_recommendation_query(message_lower) and not entities.get("teams"):
+        if "recommendation" in odds_intents and not entities.get("teams"):
             return await self._process_betting_recommendations(entities, fixtures)
-        elif self._is_competitive_query(message_lower):
+        elif "competitive" in odds_intents:
             return await self._process_competitive_analysis(entities, fixtures)
-        elif self._is_favorite_query(message_lower) and entities.get("teams"):
+        elif "favorite" in odds_intents and entities.get("teams"):
             return await self._process_favorite_comparison(entities, fixtures)
         elif entities.get("amount", 0) > 0:
             return await self._process_bet_simulation(entities, fixtures)
         else:
             return await self._process_standard_odds(fixtures)
 
-    async def _get_balance(self) -> Dict[str, Any]:
+    async def _get_balance(self, entities: Dict, api_data: Dict, context: UserContext) -> Dict[str, Any]:
         try:
             balance_data = await self.data_service.chatbet_client.get_user_balance()
             return {"user_balance": balance_data.get("balance", 0)}
@@ -103,56 +138,80 @@ class APIAnalyzer:
             logger.error(f"Error getting balance: {str(e)}")
             return {"user_balance": 1000, "balance_note": "Using demo balance"}
 
-    def _is_recommendation_query(self, message: str) -> bool:
-        return any(word in message for word in ["recommend", "suggestion", "best bet", "should I bet"])
-    
-    def _is_competitive_query(self, message: str) -> bool:
-        return any(word in message for word in ["competitive", "balanced", "close", "tight"])
-    
-    def _is_favorite_query(self, message: str) -> bool:
-        return any(word in message for word in ["favorite", "favored", "between"])
+    def _competitor_names(self, fixture: Dict) -> Tuple[str, str]:
+        fixture_get = fixture.get
+        return (
+            fixture_get("homeCompetitorName", _EMPTY).get("en", ""),
+            fixture_get("awayCompetitorName", _EMPTY).get("en", "")
+        )
+
+    def _build_name_index(self, fixtures: List) -> Dict[str, Tuple[Dict, str]]:
+        """Map casefolded competitor names to (fixture, bet_type), keeping the first fixture per name"""
+        name_index = {}
+        for fixture in fixtures:
+            home_team, away_team = self._competitor_names(fixture)
+            name_index.setdefault(home_team.casefold(), (fixture, "home_win"))
+            name_index.setdefault(away_team.casefold(), (fixture, "away_win"))
+        name_index.pop("", None)
+        return name_index
+
+    def _team_bet_type(self, team_cf: str, fixture: Dict) -> Optional[str]:
+        home_team, away_team = self._competitor_names(fixture)
+        if team_cf in home_team.casefold():
+            return "home_win"
+        if team_cf in away_team.casefold():
+            return "away_win"
+        return None
+
+    def _classify_odds_intent(self, message: str) -> Set[str]:
+        """Return every odds intent whose keywords appear in the lowercased message"""
+        return {match.lastgroup for match in _ODDS_INTENT_RE.finditer(message)}
+
+    def likely_needs_sports_data(self, message: str) -> bool:
+        """Cheap keyword check for whether a message will probably trigger fixture or odds actions"""
+        return _SPORTS_DATA_RE.search(message) is not None
+
+    def _odds_key(self, fixture: Dict) -> Optional[Tuple[int, int, int]]:
+        """(sport_id, tournament_id, fixture_id) the odds endpoint needs, or None if the fixture lacks one"""
+        tournament_id = fixture.get("tournament_id") or fixture.get("tournamentId")
+        if not fixture.get("id") or not tournament_id:
+            return None
+        return (fixture.get("sport_id") or fixture.get("sportId") or DEFAULT_SPORT_ID, tournament_id, fixture["id"])
+
+    async def _fetch_fixture_odds(self, fixtures: List) -> List[Tuple[Dict, Dict]]:
+        """Fetch odds for all fixtures through the data service's bounded batch, returning (fixture, odds_data) pairs"""
+        keyed_fixtures = [(fixture, self._odds_key(fixture)) for fixture in fixtures]
+        keyed_fixtures = [(fixture, key) for fixture, key in keyed_fixtures if key is not None]
+        
+        odds_by_key = await self.data_service.get_odds_for_fixtures([key for _, key in keyed_fixtures])
+        return [(fixture, odds_by_key.get(key, {})) for fixture, key in keyed_fixtures]
 
     async def _process_betting_recommendations(self, entities: Dict, fixtures: List) -> Dict[str, Any]:
         logger.info("Processing betting recommendation query")
-        all_odds = []
         analyzed_fixtures = []
         betting_recommendations = []
         
         if not entities.get("dates"):
-            today_fixtures = self.data_service.find_fixtures_by_date(fixtures, "today")
-            tomorrow_fixtures = self.data_service.find_fixtures_by_date(fixtures, "tomorrow")
-            recent_fixtures = today_fixtures + tomorrow_fixtures
+            today_fixtures = self.data_service.find_fixtures_by_date(fixtures, "today", limit=5)
+            tomorrow_fixtures = self.data_service.find_fixtures_by_date(fixtures, "tomorrow", limit=5)
+            recent_fixtures = list(islice(chain(today_fixtures, tomorrow_fixtures), 5))
         else:
-            recent_fixtures = fixtures
+            recent_fixtures = fixtures[:5]
         
-        for fixture in recent_fixtures[:5]:
+        for fixture, odds_data in await self._fetch_fixture_odds(recent_fixtures):
             try:
-                fixture_id = fixture.get("id")
-                if not fixture_id:
-                    continue
-                
-                odds_data = await self.data_service.get_odds_for_fixture(fixture_id)
-                
-                if odds_data and odds_data.get("data"):
-                    extracted_odds = self.data_service.extract_main_odds(odds_data["data"])
+                if odds_data and odds_data.get("result"):
+                    extracted_odds = self.data_service.extract_best_odds(odds_data)
                     
                     if extracted_odds:
-                        home_win_odds = None
-                        away_win_odds = None
-                        draw_odds = None
-                        
-                        for odd in extracted_odds:
-                            if odd.get("bet_type") == "home_win":
-                                home_win_odds = odd.get("odds")
-                            elif odd.get("bet_type") == "away_win":
-                                away_win_odds = odd.get("odds")
-                            elif odd.get("bet_type") == "draw":
-                                draw_odds = odd.get("odds")
+                        odds_map = self.data_service.extract_main_odds_map(extracted_odds)
+                        home_win_odds = odds_map.get("home_win")
+                        away_win_odds = odds_map.get("away_win")
+                        draw_odds = odds_map.get("draw")
                         
                         if home_win_odds and away_win_odds:
-                            home_team = fixture.get("homeCompetitorName", {}).get("en", "")
-                            away_team = fixture.get("awayCompetitorName", {}).get("en", "")
-                            tournament = fixture.get("tournament_name", {}).get("en", "")
+                            home_team, away_team = self._competitor_names(fixture)
+                            tournament = fixture.get("tournament_name", _EMPTY).get("en", "")
                             
                             recommendation = self._analyze_betting_recommendation(
                                 home_team, away_team, tournament,
@@ -171,12 +230,9 @@ class APIAnalyzer:
                 logger.error(f"Error processing fixture {fixture.get('id')}: {str(e)}")
                 continue
         
-        betting_recommendations.sort(key=lambda x: x["score"], reverse=True)
-        
         return {
-            "odds": all_odds,
             "analyzed_fixtures": analyzed_fixtures,
-            "betting_recommendations": betting_recommendations[:3]
+            "betting_recommendations": heapq.nlargest(3, betting_recommendations, key=lambda x: x["score"])
         }
 
     def _analyze_betting_recommendation(self, home_team: str, away_team: str, tournament: str,
@@ -242,31 +298,18 @@ class APIAnalyzer:
         logger.info("Processing competitive analysis query")
         competitive_matches = []
         
-        target_fixtures = fixtures[:8] if not entities.get("dates") else fixtures
+        target_fixtures = fixtures[:8] if not entities.get("dates") else fixtures[:MAX_COMPETITIVE_FIXTURES]
         
-        for fixture in target_fixtures:
+        for fixture, odds_data in await self._fetch_fixture_odds(target_fixtures):
             try:
-                fixture_id = fixture.get("id")
-                if not fixture_id:
-                    continue
-                
-                odds_data = await self.data_service.get_odds_for_fixture(fixture_id)
-                
-                if odds_data and odds_data.get("data"):
-                    extracted_odds = self.data_service.extract_main_odds(odds_data["data"])
+                if odds_data and odds_data.get("result"):
+                    extracted_odds = self.data_service.extract_best_odds(odds_data)
                     
                     if extracted_odds:
-                        home_win_odds = None
-                        away_win_odds = None
-                        draw_odds = None
-                        
-                        for odd in extracted_odds:
-                            if odd.get("bet_type") == "home_win":
-                                home_win_odds = odd.get("odds")
-                            elif odd.get("bet_type") == "away_win":
-                                away_win_odds = odd.get("odds")
-                            elif odd.get("bet_type") == "draw":
-                                draw_odds = odd.get("odds")
+                        odds_map = self.data_service.extract_main_odds_map(extracted_odds)
+                        home_win_odds = odds_map.get("home_win")
+                        away_win_odds = odds_map.get("away_win")
+                        draw_odds = odds_map.get("draw")
                         
                         if home_win_odds and away_win_odds:
                             competitiveness_score = self._calculate_competitiveness(
@@ -286,11 +329,11 @@ class APIAnalyzer:
                 logger.error(f"Error analyzing competitiveness for fixture {fixture.get('id')}: {str(e)}")
                 continue
         
-        competitive_matches.sort(key=lambda x: x["competitiveness_score"], reverse=True)
+        top_matches = heapq.nlargest(5, competitive_matches, key=lambda x: x["competitiveness_score"])
         
         return {
-            "competitive_matches": competitive_matches[:5],
-            "most_competitive": competitive_matches[0] if competitive_matches else None
+            "competitive_matches": top_matches,
+            "most_competitive": top_matches[0] if top_matches else None
         }
 
     def _calculate_competitiveness(self, home_odds: float, away_odds: float, draw_odds: float = None) -> float:
@@ -314,48 +357,46 @@ class APIAnalyzer:
         logger.info("Processing favorite comparison query")
         team_odds = {}
         
+        name_index = self._build_name_index(fixtures)
+        team_fixtures = []
         for team in entities["teams"]:
-            team_fixtures = self.data_service.find_team_in_fixtures(team, fixtures)
-            
-            if team_fixtures:
-                for fixture in team_fixtures[:1]:
-                    try:
-                        fixture_id = fixture.get("id")
-                        if not fixture_id:
-                            continue
-                        
-                        odds_data = await self.data_service.get_odds_for_fixture(fixture_id)
-                        
-                        if odds_data and odds_data.get("data"):
-                            extracted_odds = self.data_service.extract_main_odds(odds_data["data"])
-                            
-                            home_team = fixture.get("homeCompetitorName", {}).get("en", "")
-                            away_team = fixture.get("awayCompetitorName", {}).get("en", "")
-                            
-                            if team.lower() in home_team.lower():
-                                for odd in extracted_odds:
-                                    if odd.get("bet_type") == "home_win":
-                                        team_odds[team] = {
-                                            "odds": odd.get("odds"),
-                                            "match": f"{home_team} vs {away_team}",
-                                            "fixture": fixture,
-                                            "all_odds": extracted_odds
-                                        }
-                                        break
-                            elif team.lower() in away_team.lower():
-                                for odd in extracted_odds:
-                                    if odd.get("bet_type") == "away_win":
-                                        team_odds[team] = {
-                                            "odds": odd.get("odds"),
-                                            "match": f"{home_team} vs {away_team}",
-                                            "fixture": fixture,
-                                            "all_odds": extracted_odds
-                                        }
-                                        break
+            team_cf = team.casefold()
+            match = name_index.get(team_cf)
+            if match is None:
+                matching_fixtures = self.data_service.find_team_in_fixtures(team, fixtures, limit=1)
+                if matching_fixtures:
+                    match = (matching_fixtures[0], self._team_bet_type(team_cf, matching_fixtures[0]))
+            if match and match[0].get("id"):
+                team_fixtures.append((team, *match))
+        
+        unique_fixtures = list({fixture["id"]: fixture for _, fixture, _ in team_fixtures}.values())
+        odds_by_fixture = {
+            fixture["id"]: odds_data
+            for fixture, odds_data in await self._fetch_fixture_odds(unique_fixtures)
+        }
+        
+        for team, fixture, bet_type in team_fixtures:
+            try:
+                odds_data = odds_by_fixture.get(fixture["id"])
+                
+                if odds_data and odds_data.get("result"):
+                    extracted_odds = self.data_service.extract_best_odds(odds_data)
                     
-                    except Exception as e:
-                        logger.error(f"Error getting odds for team {team}: {str(e)}")
-                        continue
+                    home_team, away_team = self._competitor_names(fixture)
+                    
+                    odds_map = self.data_service.extract_main_odds_map(extracted_odds)
+                    
+                    if bet_type and bet_type in odds_map:
+                        team_odds[team] = {
+                            "odds": odds_map[bet_type],
+                            "match": f"{home_team} vs {away_team}",
+                            "fixture": fixture,
+                            "all_odds": extracted_odds
+                        }
+            
+            except Exception as e:
+                logger.error(f"Error getting odds for team {team}: {str(e)}")
+                continue
         
         favorite_team = None
         if len(team_odds) >= 2:
@@ -374,26 +415,20 @@ class APIAnalyzer:
         
         target_fixtures = fixtures[:6]
         
-        for fixture in target_fixtures:
+        for fixture, odds_data in await self._fetch_fixture_odds(target_fixtures):
             try:
-                fixture_id = fixture.get("id")
-                if not fixture_id:
-                    continue
-                
-                odds_data = await self.data_service.get_odds_for_fixture(fixture_id)
-                
-                if odds_data and odds_data.get("data"):
-                    extracted_odds = self.data_service.extract_main_odds(odds_data["data"])
+                if odds_data and odds_data.get("result"):
+                    extracted_odds = self.data_service.extract_best_odds(odds_data)
                     
                     if extracted_odds:
-                        home_team = fixture.get("homeCompetitorName", {}).get("en", "")
-                        away_team = fixture.get("awayCompetitorName", {}).get("en", "")
+                        home_team, away_team = self._competitor_names(fixture)
                         
                         for odd in extracted_odds:
-                            bet_type = odd.get("bet_type")
-                            odds_value = odd.get("odds")
+                            odd_get = odd.get
+                            bet_type = odd_get("bet_type")
+                            odds_value = odd_get("odds")
                             
-                            if bet_type in ["home_win", "away_win", "draw"] and odds_value:
+                            if bet_type in ("home_win", "away_win", "draw") and odds_value:
                                 potential_return = bet_amount * odds_value
                                 profit = potential_return - bet_amount
                                 
@@ -419,26 +454,18 @@ class APIAnalyzer:
                 logger.error(f"Error simulating bet for fixture {fixture.get('id')}: {str(e)}")
                 continue
         
-        simulation_options.sort(key=lambda x: x["profit"], reverse=True)
-        
         return {
-            "simulation_options": simulation_options[:10],
+            "simulation_options": heapq.nlargest(10, simulation_options, key=lambda x: x["profit"]),
             "bet_amount": bet_amount
         }
 
     async def _process_standard_odds(self, fixtures: List) -> Dict[str, Any]:
         all_odds = []
         
-        for fixture in fixtures[:5]:
+        for fixture, odds_data in await self._fetch_fixture_odds(fixtures[:5]):
             try:
-                fixture_id = fixture.get("id")
-                if not fixture_id:
-                    continue
-                
-                odds_data = await self.data_service.get_odds_for_fixture(fixture_id)
-                
-                if odds_data and odds_data.get("data"):
-                    extracted_odds = self.data_service.extract_main_odds(odds_data["data"])
+                if odds_data and odds_data.get("result"):
+                    extracted_odds = self.data_service.extract_best_odds(odds_data)
                     all_odds.extend(extracted_odds)
             
             except Exception as e:
@@ -1,6 +1,23 @@
-from typing import Dict, Any
+from typing import Dict, Iterator, Tuple
 from app.models.schemas import UserContext
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import islice
+from importlib.resources import files
+from string import Template
+import sys
+
+# Rendered system prompts keyed by (language, date ordinal); only the current day is kept
+_PROMPT_CACHE: Dict[Tuple[str, int], str] = {}
+
+# English calendar names, used instead of locale-dependent strftime calls
+_MONTHS_FULL = ("January", "February", "March", "April", "May", "June", "July",
+                "August", "September", "October", "November", "December")
+_MONTHS_ABBR = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+                "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_DAYS_UPPER = ("MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY", "SATURDAY", "SUNDAY")
+# Days until the next Sunday, indexed by date.weekday()
+_DAYS_TO_NEXT_SUNDAY = (6, 5, 4, 3, 2, 1, 7)
 
 
 class PromptBuilder:
@@ -14,204 +31,92 @@ class PromptBuilder:
     """
     
     @staticmethod
-    def get_system_prompt() -> str:
+    def get_system_prompt(language: str = "en") -> str:
         """Generate the main system prompt for the AI model with dynamic dates"""
+        ordinal = date.today().toordinal()
+        key = (language, ordinal)
+        prompt = _PROMPT_CACHE.get(key)
+        if prompt is None:
+            for stale_key in [k for k in _PROMPT_CACHE if k[1] != ordinal]:
+                del _PROMPT_CACHE[stale_key]
+            prompt = _PROMPT_CACHE[key] = PromptBuilder._load_template(language).safe_substitute(
+                PromptBuilder._date_vars(ordinal)
+            )
+        return prompt
+    
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _load_template(language: str) -> Template:
+        """Read the system prompt template for a language from app/ai/prompts"""
+        template = files("app.ai").joinpath("prompts").joinpath(f"system_{language}.tmpl")
+        return Template(sys.intern(template.read_text(encoding="utf-8")))
+    
+    @staticmethod
+    @lru_cache(maxsize=2)
+    def _date_vars(ordinal: int) -> Dict[str, str]:
+        """Date values substituted into the system prompt template for a given day"""
         
         # Get current date and calculate dynamic dates
-        today = datetime.now()
-        today_str = today.strftime("%B %d, %Y")
-        today_day = today.strftime("%A").upper()
+        today = date.fromordinal(ordinal)
+        today_str = f"{_MONTHS_FULL[today.month - 1]} {today.day:02d}, {today.year}"
+        today_day = _DAYS_UPPER[today.weekday()]
         
         # Calculate tomorrow and next Sunday
         tomorrow = today + timedelta(days=1)
         
-        # Find next Sunday
-        days_until_sunday = (6 - today.weekday()) % 7
-        if days_until_sunday == 0:  # If today is Sunday
-            days_until_sunday = 7
-        next_sunday = today + timedelta(days=days_until_sunday)
+        # Find next Sunday (a week ahead when today is Sunday)
+        next_sunday = today + timedelta(days=_DAYS_TO_NEXT_SUNDAY[today.weekday()])
         
         # Format dates in English
-        today_formatted = today.strftime("%b %d")
-        tomorrow_formatted = tomorrow.strftime("%b %d")
-        sunday_formatted = next_sunday.strftime("%b %d")
+        today_formatted = f"{_MONTHS_ABBR[today.month - 1]} {today.day:02d}"
+        tomorrow_formatted = f"{_MONTHS_ABBR[tomorrow.month - 1]} {tomorrow.day:02d}"
+        sunday_formatted = f"{_MONTHS_ABBR[next_sunday.month - 1]} {next_sunday.day:02d}"
         
         # Format for API (MM-DD)
-        today_api = today.strftime("%m-%d")
-        tomorrow_api = tomorrow.strftime("%m-%d") 
-        sunday_api = next_sunday.strftime("%m-%d")
+        today_api = f"{today.month:02d}-{today.day:02d}"
+        tomorrow_api = f"{tomorrow.month:02d}-{tomorrow.day:02d}"
+        sunday_api = f"{next_sunday.month:02d}-{next_sunday.day:02d}"
         
         # Date range for available matches
         end_date = today + timedelta(days=7)
-        end_date_formatted = end_date.strftime("%B %d")
-        
-        return f"""
-        You are ChatBet AI, a friendly and enthusiastic sports betting assistant who loves helping users discover great matches and betting opportunities.
-
-        AVAILABLE SPORTS:
-        - Football (Soccer) - ID: 1 - Tournaments: Champions League, Premier League, La Liga, Serie A, Bundesliga
-        - Basketball - ID: 3 - Tournaments: NBA, WNBA, EuroLeague
-        - Tennis, American Football, Ice Hockey, Cricket, Baseball also available
-
-        CURRENT DATES: Today is {today_str} ({today_day}).
-        CALENDAR:
-        - {today_formatted} ({today_day}) = TODAY
-        - {tomorrow_formatted} = TOMORROW
-        - {sunday_formatted} = NEXT SUNDAY
-        - Matches available from {today_formatted} to {end_date_formatted}
-
-        POPULAR TEAMS AVAILABLE: Barcelona, Real Madrid, Liverpool, Manchester City, PSG, Bayern Munich, 
-        Juventus, Arsenal, Tottenham, Chelsea, Inter Milan, Atletico Madrid, Borussia Dortmund, etc.
-
-        QUERY TYPES YOU HANDLE:
-        1. TEAM SCHEDULES: "When does Barcelona play?"
-        2. MATCHES BY DATE: "What matches are tomorrow?" / "Sunday games"
-        3. TEAMS BY TOURNAMENT: "Which teams play in Champions League?" / "Who participates in La Liga?"
-        4. ODDS: "What's the draw odds for Real Madrid vs PSG?"
-        5. FAVORITE COMPARISONS: "Who is the favorite between Barcelona and Real Madrid?"
-        6. MOST COMPETITIVE MATCHES: "Which is the most competitive match this weekend?"
-        7. BALANCE: "What's my balance?"
-        8. SIMULATIONS: "Simulate a $50 bet on Liverpool"
-        9. RECOMMENDATIONS: "Which match do you recommend for betting?"
-        10. BET CONFIRMATION: "Confirm bet on Liverpool to win with $50"
-        11. BET TRACKING: "Show my simulated bets" / "What bets have I made?"
-
-        PERSONALITY & TONE:
-        - Be extremely friendly, enthusiastic, and conversational like talking to a close friend
-        - Use casual, jovial expressions: "Hey!", "How's it going!", "Perfect!", "Awesome!", "I love that question!"
-        - Show genuine excitement about matches: "Wow, that game is going to be amazing!", "What a match!"
-        - Use informal language: "Hey", "Look", "You know what?", "Let me tell you", "Between you and me"
-        - Be encouraging and supportive: "Great choice!", "You're on the right track!"
-        - Show personality with phrases like: "Don't tell me that...", "You're in luck!", "Check out this fact!"
-        - Use sports slang: "big match", "star player", "amazing goal", "great team", "incredible play"
-        - Add humor when appropriate: "More exciting than a final!"
-        - Make recommendations sound personal: "If it were me, I'd bet on...", "My heart says..."
-        - Be conversational: "Did you know...?", "Let me tell you something interesting..."
-        - Show empathy: "I totally get it", "It's clear what you're looking for"
-        - Create anticipation: "Wait for this...", "Get ready because..."
+        end_date_formatted = f"{_MONTHS_FULL[end_date.month - 1]} {end_date.day:02d}"
         
-        INSTRUCTIONS:
-        - ALWAYS respond in English with a super friendly, casual, and jovial tone
-        - Start with enthusiastic greetings: "Hey, how's it going!", "Hi there!", "Hello champ!"
-        - Use conversation starters: "Hey, let me tell you...", "Look what I've got for you..."
-        - Make it feel like chatting with a best friend who knows everything about sports
-        - Keep the energy high and the language natural and flowing
-        - For bets, mention they're SIMULATED but in a fun way: "Let's simulate the bet!", "We're playing with virtual money!"
-        - When looking up data, build excitement: "Give me a second to find the best info...", "Let's see what surprises await!"
-        - Use transitional phrases: "By the way", "Oh, and another thing", "You know what else?"
-        - DATES: Use format "MM-DD" (e.g.: "{sunday_api}" for Sunday)
-        - DAYS: "today"={today_api}, "tomorrow"={tomorrow_api}, "Sunday"={sunday_api}
-        - Make comparisons exciting: "Wow, this comparison is interesting!"
-        - End responses with engaging questions or comments: "What do you think?", "Tell me what you think!"
-
-        Respond in JSON format:
-        {{
-            "intent": "team_schedule|match_query|odds_query|bet_simulation|user_balance|recommendations|competitive_analysis|bet_confirmation|bet_tracking|general",
-            "entities": {{
-            "teams": ["team1", "team2"],
-            "dates": ["{today_api}", "{tomorrow_api}", "{sunday_api}", "today", "tomorrow", "sunday", "weekend"],
-            "bet_types": ["home_win", "away_win", "draw", "over", "under"],
-            "sports": ["football", "basketball"],
-            "tournaments": ["Champions League", "La Liga", "Premier League", "Serie A"],
-            "amount": 0,
-            "confirmation": false
-            }},
-            "api_actions": ["get_fixtures", "get_odds", "get_balance"],
-            "response": "natural_response_to_user",
-            "needs_api_data": true/false,
-            "confidence": 0.95
-        }}
-
-        IMPORTANT FOR TOURNAMENT QUERIES:
-        - "Which teams play in Champions League?" → intent: "match_query", api_actions: ["get_fixtures"]
-        - "Who participates in La Liga?" → intent: "match_query", api_actions: ["get_fixtures"]
-        - To get teams from a tournament, ALWAYS need API data (needs_api_data: true)
-
-        IMPORTANT FOR ODDS COMPARISON QUERIES:
-        - "What's the lowest odd on Sunday?" → intent: "odds_query", api_actions: ["get_odds"], dates: ["{sunday_api}", "sunday"]
-        - "Which team has the best odds today?" → intent: "recommendations", api_actions: ["get_odds"], dates: ["{today_api}", "today"]
-        - "What's the highest odd tomorrow?" → intent: "odds_query", api_actions: ["get_odds"], dates: ["{tomorrow_api}", "tomorrow"]
-        - For multiple odds comparisons, ALWAYS use get_odds (needs_api_data: true)
-
-        IMPORTANT FOR FAVORITE COMPARISONS:
-        - "Who is the favorite between Barcelona and Real Madrid?" → intent: "recommendations", api_actions: ["get_odds"], teams: ["Barcelona", "Real Madrid"]
-        - "Which team is favored: Arsenal or Chelsea?" → intent: "recommendations", api_actions: ["get_odds"], teams: ["Arsenal", "Chelsea"]  
-        - To determine favorite between teams, ALWAYS need odds from both teams (needs_api_data: true)
-        - FUNDAMENTAL RULE: Lower odds = Favorite, higher odds = Underdog
-        - WHEN comparison_type="favorite_teams": Compare ONLY victory odds of each team and declare favorite DIRECTLY
-        - DIRECT RESPONSE REQUIRED: "Real Madrid is the favorite with odds 1.36, compared to Barcelona with odds 2.32"
-        - DO NOT explain separate matches, ONLY compare odds and give clear, concise response
-
-        IMPORTANT FOR COMPETITIVENESS ANALYSIS:
-        - "Which is the most competitive match this weekend?" → intent: "competitive_analysis", api_actions: ["get_odds"], dates: ["weekend"]
-        - "What's the most balanced game today?" → intent: "competitive_analysis", api_actions: ["get_odds"], dates: ["today"] 
-        - "Most competitive match tomorrow?" → intent: "competitive_analysis", api_actions: ["get_odds"], dates: ["tomorrow"]
-        - COMPETITIVENESS RULE: Smaller difference between victory odds = more competitive
-        - ALSO CONSIDER: Low draw odds indicate greater parity between teams
-        - ANALYSIS: Get odds from multiple matches and compare probability balance
-        - For competitiveness analysis, ALWAYS need odds from multiple matches (needs_api_data: true)
-
-        IMPORTANT FOR BETTING RECOMMENDATIONS:
-        - "Which match do you recommend I bet on?" → intent: "recommendations", api_actions: ["get_odds"], dates: ["today", "tomorrow"]
-        - "What's the best bet today?" → intent: "recommendations", api_actions: ["get_odds"], dates: ["today"]
-        - "Give me a betting recommendation" → intent: "recommendations", api_actions: ["get_odds"]
-        - RECOMMENDATION TYPES: 1) Safe bets (low odds, high probability), 2) Value (medium odds with good return), 3) Potential upsets (underdogs with chances)
-        - ANALYSIS CRITERIA: Attractive odds, important tournaments, known teams, risk/reward balance
-        - ALWAYS MENTION: That bets are SIMULATED and the risk involved
-        - For general recommendations, get odds from multiple recent matches (needs_api_data: true)
-
-        IMPORTANT FOR BET SIMULATIONS:
-        - "What can I bet with $100?" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 100
-        - "Simulate a $50 bet on Liverpool" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 50, teams: ["Liverpool"]
-        - "How much would I win with $200?" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 200
-        - "Show me betting options for $75" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 75
-        - "How much profit with $75?" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 75
-        - "What profit can I make with $300?" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 300
-        - "Simulate 150 dollars bet" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 150
-        - "How much return on $80?" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 80
-        - "Show profit for $120 bet" → intent: "bet_simulation", api_actions: ["get_odds"], amount: 120
-        - DETECT AMOUNTS: Extract quantities like $100, $50, €200, 75 dollars, etc.
-        - KEYWORDS: bet, profit, win, return, simulate, options (with amount) = bet_simulation
-        - CALCULATIONS: Profit = (Odds × Amount) - Amount, Total = Odds × Amount
-        - SHOW: All available betting options with profit calculations
-        - ALWAYS CLARIFY: These are simulations, not real bets
-        - For simulations, get odds from available matches (needs_api_data: true)
-        
-        IMPORTANT FOR SIMULATED BET CONFIRMATION:
-        - "Confirm bet on Liverpool to win with $50" → intent: "bet_confirmation", api_actions: ["get_odds"], teams: ["Liverpool"], amount: 50, bet_types: ["home_win"], confirmation: true
-        - "I want to place the $25 bet on draw" → intent: "bet_confirmation", api_actions: ["get_odds"], amount: 25, bet_types: ["draw"], confirmation: true
-        - "Yes, confirm that simulation" → intent: "bet_confirmation", confirmation: true
-        - REQUIRES: Get odds to confirm simulated bet
-        - GENERATES: Unique ID for the simulated bet
-        - STORES: In user context for tracking
-        
-        IMPORTANT FOR SIMULATED BET TRACKING:
-        - "Show my simulated bets" → intent: "bet_tracking", api_actions: [], needs_api_data: false
-        - "What bets have I made?" → intent: "bet_tracking"
-        - "My bet history" → intent: "bet_tracking"
-        - SHOWS: List of user's simulated bets
-        - INCLUDES: Status, amount, potential winnings, teams
-        - CONTEXT: Use data stored in user context
-        """
+        return {
+            "today_str": today_str,
+            "today_day": today_day,
+            "today_formatted": today_formatted,
+            "tomorrow_formatted": tomorrow_formatted,
+            "sunday_formatted": sunday_formatted,
+            "end_date_formatted": end_date_formatted,
+            "today_api": today_api,
+            "tomorrow_api": tomorrow_api,
+            "sunday_api": sunday_api,
+        }
     
     @staticmethod
     def build_context_prompt(context: UserContext, current_message: str) -> str:
         """Build prompt with conversation context"""
-        context_info = ""
+        if not (context.conversation_history or context.mentioned_teams
+                or context.last_intent or context.user_balance):
+            return f"\nCURRENT USER MESSAGE: {current_message}"
         
-        if context.conversation_history:
-            context_info += "RECENT CONVERSATION HISTORY:\n"
-            for i, msg in enumerate(context.conversation_history[-3:]):
-                context_info += f"{i+1}. User: {msg.get('user_message', '')}\n"
-                context_info += f"   Bot: {msg.get('bot_response', '')}\n"
+        context_info = "".join(PromptBuilder._iter_context_lines(context))
+        return f"{context_info}\nCURRENT USER MESSAGE: {current_message}"
+    
+    @staticmethod
+    def _iter_context_lines(context: UserContext) -> Iterator[str]:
+        """Yield newline-terminated context lines for the fields that are set"""
+        history = context.conversation_history
+        if history:
+            yield "RECENT CONVERSATION HISTORY:\n"
+            for i, msg in enumerate(islice(history, max(len(history) - 3, 0), None), 1):
+                yield f"{i}. User: {msg.get('user_message', '')}\n   Bot: {msg.get('bot_response', '')}\n"
         
         if context.mentioned_teams:
-            context_info += f"PREVIOUSLY MENTIONED TEAMS: {', '.join(context.mentioned_teams)}\n"
+            yield f"PREVIOUSLY MENTIONED TEAMS: {context.mentioned_teams_joined}\n"
         
         if context.last_intent:
-            context_info += f"LAST INTENT: {context.last_intent}\n"
+            yield f"LAST INTENT: {context.last_intent}\n"
         
         if context.user_balance:
-            context_info += f"USER BALANCE: ${context.user_balance}\n"
-        
-        return f"{context_info}\nCURRENT USER MESSAGE: {current_message}"
\ No newline at end of file
+            yield f"USER BALANCE: {context.user_balance_str}\n"
\ No newline at end of file
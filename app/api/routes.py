@@ -1,50 +1,49 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from app.models.schemas import ChatMessage, ChatResponse
 from app.services.chatbot_service import ChatBotService
-from app.config import settings
+from app.config import Settings, get_settings
+from itertools import islice
+from typing import Annotated
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
-chatbot_service = ChatBotService()
+
+
+def get_chatbot_service(request: Request) -> ChatBotService:
+    return request.app.state.chatbot_service
 
 
 @router.get("/")
-async def root():
-    return JSONResponse(
-        content={
-            "message": "ChatBet AI Assistant API",
-            "version": settings.api_version,
-            "status": "running"
-        },
-        media_type="application/json; charset=utf-8"
-    )
+async def root(settings: Annotated[Settings, Depends(get_settings)]):
+    return {
+        "message": "ChatBet AI Assistant API",
+        "version": settings.api_version,
+        "status": "running"
+    }
 
 
 @router.get("/health")
-async def health_check():
-    return JSONResponse(
-        content={
-            "status": "healthy",
-            "timestamp": "2024-01-01T00:00:00Z",
-            "version": settings.api_version
-        },
-        media_type="application/json; charset=utf-8"
-    )
+async def health_check(settings: Annotated[Settings, Depends(get_settings)]):
+    return {
+        "status": "healthy",
+        "timestamp": "2024-01-01T00:00:00Z",
+        "version": settings.api_version
+    }
 
 
-@router.post("/chat")
-async def chat_endpoint(message: ChatMessage):
+@router.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(
+    message: ChatMessage,
+    chatbot_service: ChatBotService = Depends(get_chatbot_service)
+):
     try:
-        message.session_id = "1"
         logger.info(f"Processing message from session {message.session_id}: {message.message}")
         response = await chatbot_service.process_message(message)
         logger.info(f"Generated response with intent: {response.intent}")
-        return JSONResponse(
-            content=response.dict(),
-            media_type="application/json; charset=utf-8"
-        )
+        return response
         
     except Exception as e:
         logger.error(f"Error processing chat message: {e}")
@@ -54,14 +53,36 @@ async def chat_endpoint(message: ChatMessage):
         )
 
 
+@router.post("/chat/stream")
+async def chat_stream_endpoint(
+    message: ChatMessage,
+    chatbot_service: ChatBotService = Depends(get_chatbot_service)
+):
+    logger.info(f"Streaming message from session {message.session_id}: {message.message}")
+    
+    async def event_stream():
+        async for event in chatbot_service.stream_message(message):
+            yield f"event: {event['event']}\ndata: {orjson.dumps(event['data']).decode()}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
 @router.get("/chat/context/{session_id}")
-async def get_conversation_context(session_id: str):
+async def get_conversation_context(
+    session_id: str,
+    chatbot_service: ChatBotService = Depends(get_chatbot_service)
+):
     try:
         context = await chatbot_service._get_user_context(session_id)
+        history = context.conversation_history
         return {
             "session_id": context.session_id,
-            "conversation_history": context.conversation_history[-5:],
-            "mentioned_teams": context.mentioned_teams,
+            "conversation_history": list(islice(history, max(len(history) - 5, 0), None)),
+            "mentioned_teams": list(context.mentioned_teams),
             "last_intent": context.last_intent,
             "user_balance": context.user_balance
         }
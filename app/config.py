@@ -1,5 +1,6 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
+from functools import lru_cache
 
 
 class Settings(BaseSettings):
@@ -18,6 +19,8 @@ class Settings(BaseSettings):
     
     chatbet_api_base_url: str = "https://v46fnhvrjvtlrsmnismnwhdh5y0lckdl.lambda-url.us-east-1.on.aws"
     chatbet_api_timeout: int = 30
+    chatbet_api_max_connections: int = 100
+    chatbet_api_max_keepalive_connections: int = 20
     
     google_ai_api_key: str
     google_ai_model: str = "gemini-1.5-flash"
@@ -25,11 +28,16 @@ class Settings(BaseSettings):
     debug: bool = False
     max_conversation_history: int = 10
     conversation_timeout: int = 3600
+    templated_favorite_responses: bool = True
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Parse the environment once and share the result (usable as a FastAPI dependency)"""
+    return Settings()
 
 
 # Global settings instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.config import settings
 from app.api.routes import router
+from app.services.chatbot_service import ChatBotService
+from contextlib import asynccontextmanager
 import logging
 
 """
@@ -18,16 +21,28 @@ Features:
 - CORS-enabled for web client integration
 - Health monitoring and status endpoints
 - Session-based user interactions
-- JSON response formatting with UTF-8 support
+- Fast JSON response encoding with orjson (UTF-8)
 """
 
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=logging.INFO if settings.debug else logging.WARNING)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the shared chatbot service once per worker, after the event loop is running
+    app.state.chatbot_service = ChatBotService()
+    await app.state.chatbot_service.startup()
+    yield
+    await app.state.chatbot_service.shutdown()
+
+
 app = FastAPI(
     title=settings.api_title,
     version=settings.api_version,
     description=settings.api_description,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -45,8 +60,11 @@ app.include_router(router)
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        "main:app",
+        "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=settings.debug
+        reload=settings.debug,
+        access_log=settings.debug,
+        proxy_headers=False,
+        log_level="info" if settings.debug else "warning"
     )
\ No newline at end of file
@@ -1,6 +1,8 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from typing import List, Optional, Dict, Any, Tuple, Deque, Set
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from datetime import datetime
+from collections import deque
+from app.config import settings
 
 """
 ChatBet AI Models - Pydantic Data Models
@@ -35,18 +37,60 @@ class ChatResponse(BaseModel):
     intent: Optional[str] = None
     confidence: Optional[float] = None
     data: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
 
 class UserContext(BaseModel):
     user_id: Optional[str] = None
     session_id: str
-    conversation_history: List[Dict[str, Any]] = []
+    conversation_history: Deque[Dict[str, Any]] = Field(
+        default_factory=lambda: deque(maxlen=settings.max_conversation_history)
+    )
     last_intent: Optional[str] = None
-    mentioned_teams: List[str] = []
-    mentioned_tournaments: List[str] = []
+    mentioned_teams: List[str] = Field(default_factory=list)
+    mentioned_tournaments: List[str] = Field(default_factory=list)
     user_balance: Optional[float] = None
     user_key: Optional[str] = None
     auth_token: Optional[str] = None
     simulated_bets: List[Dict[str, Any]] = []
+    
+    # Membership index for mentioned_teams; the list keeps first-mention order so prompts stay stable
+    _mentioned_teams_seen: Optional[Set[str]] = PrivateAttr(default=None)
+    _mentioned_teams_joined: Optional[str] = PrivateAttr(default=None)
+    _user_balance_str: Optional[Tuple[Optional[float], str]] = PrivateAttr(default=None)
+    
+    @field_validator("conversation_history")
+    @classmethod
+    def _bound_conversation_history(cls, value: Deque[Dict[str, Any]]) -> Deque[Dict[str, Any]]:
+        """Keep supplied histories bounded too, so appends drop the oldest entry instead of growing"""
+        if value.maxlen != settings.max_conversation_history:
+            value = deque(value, maxlen=settings.max_conversation_history)
+        return value
+    
+    def add_mentioned_teams(self, teams: List[str]) -> None:
+        seen = self._mentioned_teams_seen
+        if seen is None:
+            seen = self._mentioned_teams_seen = set(self.mentioned_teams)
+        
+        for team in teams:
+            if team not in seen:
+                seen.add(team)
+                self.mentioned_teams.append(team)
+                self._mentioned_teams_joined = None
+    
+    @property
+    def mentioned_teams_joined(self) -> str:
+        """Comma-separated mentioned teams, rebuilt only after the list changes"""
+        if self._mentioned_teams_joined is None:
+            self._mentioned_teams_joined = ", ".join(self.mentioned_teams)
+        return self._mentioned_teams_joined
+    
+    @property
+    def user_balance_str(self) -> str:
+        """Balance formatted for prompts, reformatted only when the balance changes"""
+        cached = self._user_balance_str
+        if cached is None or cached[0] != self.user_balance:
+            cached = self._user_balance_str = (self.user_balance, f"${self.user_balance}")
+        return cached[1]
 
 class SimulatedBet(BaseModel):
     bet_id: str
@@ -0,0 +1,86 @@
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import time
+
+_MISSING = object()
+
+
+class AsyncTTLCache:
+    """
+    Bounded in-memory cache with per-entry expiry for async data loaders.
+
+    Features:
+    - Expiry measured with the monotonic clock
+    - Least-recently-used eviction once maxsize entries are stored
+    - Single-flight loading: concurrent misses for one key share one load
+    """
+
+    def __init__(self, maxsize: int = 1024, default_ttl: float = 600.0):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def purge_expired(self) -> int:
+        """Drop entries whose TTL has passed instead of waiting for a read or LRU eviction to find them"""
+        now = time.monotonic()
+        keys = [key for key, (expires_at, _) in self._data.items() if now >= expires_at]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    async def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Return the cached value, or await loader() once for all concurrent callers and cache its result"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Shielded so one cancelled caller does not cancel the load the others are waiting on
+        return await asyncio.shield(future)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        value = await loader()
+        self.set(key, value, ttl)
+        return value
\ No newline at end of file
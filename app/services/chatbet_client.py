@@ -1,7 +1,8 @@
 import httpx
 import asyncio
+import orjson
 from typing import Dict, Any, Optional, List
-from app.config import settings
+from app.config import Settings, get_settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,10 +19,32 @@ class ChatBetClient:
     - Async HTTP requests with token-based auth
     """
     
-    def __init__(self):
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
         self.base_url = settings.chatbet_api_base_url
         self.timeout = settings.chatbet_api_timeout
+        self.limits = httpx.Limits(
+            max_connections=settings.chatbet_api_max_connections,
+            max_keepalive_connections=settings.chatbet_api_max_keepalive_connections,
+            keepalive_expiry=30.0
+        )
         self._auth_token: Optional[str] = None
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def open(self) -> httpx.AsyncClient:
+        # Shared client so connections are pooled and kept alive between requests
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits
+            )
+        return self._client
+    
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def _make_request(
         self, 
@@ -31,8 +54,6 @@ class ChatBetClient:
         json_data: Optional[Dict] = None,
         headers: Optional[Dict] = None
     ) -> Dict[str, Any]:
-        url = f"{self.base_url}{endpoint}"
-        
         default_headers = {}
         if self._auth_token:
             default_headers["token"] = self._auth_token
@@ -41,22 +62,23 @@ class ChatBetClient:
             default_headers.update(headers)
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    params=params,
-                    json=json_data,
-                    headers=default_headers
-                )
-                response.raise_for_status()
-                return response.json()
+            response = await self.open().request(
+                method=method,
+                url=endpoint,
+                params=params,
+                json=json_data,
+                headers=default_headers
+            )
         except httpx.HTTPError as e:
             logger.error(f"HTTP error occurred: {e}")
             raise
-        except Exception as e:
-            logger.error(f"Unexpected error occurred: {e}")
-            raise
+        
+        # Only failed responses pay for building an HTTPStatusError
+        if response.status_code >= 400:
+            logger.error(f"HTTP error occurred: {response.status_code} for {method} {endpoint}")
+            response.raise_for_status()
+        
+        return orjson.loads(response.content)
     
     async def generate_token(self) -> Dict[str, Any]:
         return await self._make_request("POST", "/auth/generate_token")
@@ -122,14 +144,18 @@ class ChatBetClient:
         fixture_type: str = "pre_match",
         time_zone: str = "UTC",
         language: str = "en"
-    ) -> Dict[str, Any]:
+    ) -> List[Dict[str, Any]]:
         params = {
             "sportId": sport_id,
             "type": fixture_type,
             "time_zone": time_zone,
             "language": language
         }
-        return await self._make_request("GET", "/sports/sports-fixtures", params=params)
+        fixtures = await self._make_request("GET", "/sports/sports-fixtures", params=params)
+        # The first row is a {"totalResults": ...} summary, not a fixture; drop it in place
+        if fixtures and isinstance(fixtures, list) and isinstance(fixtures[0], dict) and "totalResults" in fixtures[0]:
+            del fixtures[0]
+        return fixtures
     
     async def get_odds(
         self,
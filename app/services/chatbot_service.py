@@ -1,19 +1,180 @@
 import google.generativeai as genai
-from typing import Dict, Any, List, Optional
-from app.config import settings
+from typing import Dict, Any, List, Optional, Set, AsyncIterator, Awaitable, Callable
+from app.config import Settings, get_settings
 from app.models.schemas import ChatMessage, ChatResponse, UserContext
+from app.services.cache import AsyncTTLCache
 from app.services.chatbet_client import ChatBetClient
 from app.services.data_service import DataService
 from app.ai.prompt_builder import PromptBuilder
 from app.ai.analyzers import APIAnalyzer
-import json
+import asyncio
+import hashlib
 import logging
+import orjson
+import random
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 import re
+import time
 import uuid
 
 logger = logging.getLogger(__name__)
 
+# Exact-match cache of model replies that did not need API data
+RESPONSE_CACHE_TTL = 600
+RESPONSE_CACHE_SIZE = 1024
+
+# Seconds between sweeps that drop expired data and response cache entries
+CACHE_PURGE_INTERVAL = 30
+
+# Extracts the JSON payload when Gemini wraps its reply in a ```json fenced block
+_JSON_FENCE_RE = re.compile(r'```json\n(.*?)\n```', re.DOTALL)
+
+# Prompts for the second Gemini call that turns API data into the final reply.
+# Static instruction tails are built once here; per-request parts are joined onto them.
+RECOMMENDATIONS_HEADER = """
+USER QUESTION: {message}
+
+BETTING RECOMMENDATIONS ANALYSIS:
+BEST RECOMMENDATION:
+- Match: {match}
+- Bet type: {recommendation_type}
+- Recommended option: {option}
+- Recommended odds: {odds}
+- Tournament: {tournament}
+
+OTHER OPTIONS:"""
+RECOMMENDATION_LINE = """
+- {match}: {option} (odds {odds}) - {recommendation_type}"""
+RECOMMENDATIONS_INSTRUCTIONS = """
+
+INSTRUCTIONS:
+- Respond in English with a super friendly and enthusiastic tone, like an expert buddy
+- Start with something like "Hey! I've got the perfect recommendation for you" or "Check out what I found!"
+- Present the BEST bet with excitement: "This match is awesome!" or "What a game!"
+- Explain the bet type in casual language: "safe bet", "value play", "interesting risk"
+- Mention the specific odds with enthusiasm: "Wow, those odds look great!"
+- Include 1-2 alternatives with phrases like "If you're feeling adventurous..." or "By the way, you also have..."
+- ALWAYS mention these are SIMULATED bets but in a fun way: "We're simulating the play!" or "Playing with virtual money!"
+- Give a responsible gambling reminder but keep the positive vibe
+- Maximum 5-6 sentences, full of energy
+- End with something like "What do you think?" or "Let me know your thoughts!"
+
+Respond ONLY with the final text, no JSON format.
+"""
+
+SIMULATION_HEADER = """
+USER QUESTION: {message}
+
+BET SIMULATION WITH ${bet_amount}:
+"""
+SIMULATION_LINE = """
+- {match}: {bet_option} (odds {odds}) → Profit ${profit} (Total ${potential_return})"""
+SIMULATION_INSTRUCTIONS = """
+
+INSTRUCTIONS:
+- Respond in English with tons of excitement, like a buddy who loves betting
+- Start with something like "Hey! With ${bet_amount} you've got some awesome options" or "That's a great amount to play with!"
+- Explain the available options with enthusiasm: "Check out these spectacular plays"
+- Mention the potential profits with excitement: "You could win up to $X!" or "Wow, that profit looks amazing!"
+- Highlight the best options: "My favorite is this one", "If it were me, I'd go for..."
+- ALWAYS emphasize these are simulations in a fun way: "We're playing with Monopoly money!" or "Just for fun, but how exciting!"
+- Include a responsible gambling reminder but keep the positive energy
+- Maximum 6-8 sentences, full of energy
+- End by asking their opinion: "Which one catches your eye?" or "Which would you go for?"
+
+Respond ONLY with the final text, no JSON format.
+"""
+
+COMPETITIVE_HEADER = """
+USER QUESTION: {message}
+
+MOST COMPETITIVE MATCHES ANALYSIS:
+MOST COMPETITIVE MATCH:
+- Match: {home_team} vs {away_team}
+- Home odds: {home_win_odds}
+- Away odds: {away_win_odds}
+- Draw odds: {draw_odds}
+- Competitiveness score: {score:.3f}
+
+OTHER COMPETITIVE MATCHES:"""
+COMPETITIVE_LINE = """
+- {home_team} vs {away_team} (score: {score:.3f})"""
+COMPETITIVE_INSTRUCTIONS = """
+
+INSTRUCTIONS:
+- Respond in English with tons of excitement, like a passionate sports fan
+- Start with something like "Wow! I've got the most balanced match for you" or "Wait till you see this, it's going to be epic!"
+- Highlight the MOST COMPETITIVE match with enthusiasm: "This game is going to be a nail-biter!"
+- Mention the teams and main odds with excitement: "The odds are super close!"
+- Explain why it's competitive in an exciting way: "It's so evenly matched that anything could happen!"
+- Briefly mention 1-2 other competitive matches: "And if that's not enough, check out these too..."
+- Use sporty language: "thriller", "super close", "edge-of-your-seat", "intense"
+- Maximum 4-5 sentences, packed with energy
+- End with anticipation: "Get ready for a show!" or "This is going to be epic!"
+
+Respond ONLY with the final text, no JSON format.
+"""
+
+COMPARISON_HEADER = """
+USER QUESTION: {message}
+
+TEAMS COMPARISON BASED ON ODDS:
+"""
+COMPARISON_LINE = """
+- {team}: odds {odds} (in {match})"""
+COMPARISON_FAVORITE = """
+
+FAVORITE IDENTIFIED: {team} with odds {odds}
+"""
+COMPARISON_INSTRUCTIONS = """
+
+INSTRUCTIONS:
+- Respond in English with a super friendly and enthusiastic tone, like an expert buddy
+- Start with excitement: "Hey! I checked the odds and here's what I found" or "Wow, this is interesting!"
+- DIRECTLY identify which team has the LOWEST odds (the favorite)
+- Mention the specific odds with excitement: "Check out these odds!"
+- Explain simply that lower odds = higher probability
+- Use energetic language: "clear favorite", "the bookmakers are sure", "no doubt about it"
+- Add emotional context: "It's super obvious!" or "The odds don't lie!"
+- Maximum 2-3 sentences, full of energy
+- DO NOT mention date details
+- End with confidence: "There's your answer!" or "Crystal clear!"
+
+Respond ONLY with the final text, no JSON format.
+"""
+
+# Canned replies for clear-cut favorite questions, used instead of a second Gemini call
+FAVORITE_TEMPLATES = (
+    "Clear favorite! {team} has the lowest odds at {odds}, against {other_team} at {other_odds}, and lower odds mean a higher chance of winning. The bookmakers are backing {team} on this one. There's your answer!",
+    "Hey, I checked the odds and {team} is the favorite at {odds}, while {other_team} sits at {other_odds}! Lower odds = higher probability, so the bookmakers are pretty sure about this one. Crystal clear!",
+    "The odds don't lie: {team} is the favorite with odds of {odds}, compared to {other_odds} for {other_team}! The lower the odds, the more likely the win. There's your answer!",
+    "Wow, no doubt about it! {team} has the lowest odds at {odds} versus {other_odds} for {other_team}, which makes them the clear favorite since lower odds mean a higher probability. Crystal clear!",
+)
+# Beyond this many teams, or when the two lowest odds are this close, the model phrases the answer
+FAVORITE_TEMPLATE_MAX_TEAMS = 3
+FAVORITE_TEMPLATE_MIN_ODDS_GAP = 0.1
+
+API_DATA_PROMPT = """
+REAL DATA OBTAINED FROM CHATBET API:
+{api_data}
+
+USER'S ORIGINAL MESSAGE: {message}
+
+INSTRUCTIONS:
+- Hey! Use ONLY the real data provided above 
+- Respond in a super natural and friendly way in English, like a buddy who's passionate about betting
+- If it's about matches, mention specific teams, dates, and tournaments with excitement 
+- If it's about odds, mention the exact values with enthusiasm 
+- If it's about balance, mention the exact available amount with energy 
+- For bet simulations, calculate potential winnings and get excited 
+- ALWAYS clarify that the bets are SIMULATED but do it in a fun, positive way 
+- Use expressions like: "Hey!", "Check this out!", "Awesome!", "That's fire!", "So cool!", "This is wild!"
+
+
+Respond ONLY with the final friendly text, no JSON format.
+"""
+
 
 class ChatBotService:
     """
@@ -27,36 +188,144 @@ class ChatBotService:
     - Betting simulation and analysis
     """
     
-    def __init__(self):
-        genai.configure(api_key=settings.google_ai_api_key)
-        self.model = genai.GenerativeModel(settings.google_ai_model)
+    def __init__(self, settings: Optional[Settings] = None):
+        settings = settings or get_settings()
+        self.settings = settings
+        
+        # Gemini is configured on first use rather than when the service is built
+        self._model: Optional[genai.GenerativeModel] = None
+        self._model_lock = asyncio.Lock()
         
-        self.chatbet_client = ChatBetClient()
+        self.chatbet_client = ChatBetClient(settings)
         self.data_service = DataService(self.chatbet_client)
         self.api_analyzer = APIAnalyzer(self.data_service, self._ensure_auth_token)
         
-        self.user_contexts: Dict[str, UserContext] = {}
+        # Contexts ordered from least to most recently used, so idle sessions can be evicted from the front
+        self.user_contexts: "OrderedDict[str, UserContext]" = OrderedDict()
+        self._context_last_seen: Dict[str, float] = {}
+        self._conversation_timeout = settings.conversation_timeout
+        
+        # Model replies for identical prompts
+        self._response_cache = AsyncTTLCache(maxsize=RESPONSE_CACHE_SIZE, default_ttl=RESPONSE_CACHE_TTL)
+        self._session_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
         
         self._auth_token: Optional[str] = None
+        self._auth_lock = asyncio.Lock()
+        self._background_tasks: Set[asyncio.Task] = set()
+    
+    async def startup(self):
+        self.chatbet_client.open()
+        # Best-effort warm-up: fetch the auth token in the background so a slow ChatBet API never delays startup
+        self._start_background_task(self._ensure_auth_token())
+        self._start_background_task(self._purge_expired_caches())
+        logger.info("ChatBot service started")
+    
+    async def shutdown(self):
+        for task in list(self._background_tasks):
+            task.cancel()
+        await self.chatbet_client.aclose()
+        logger.info("ChatBot service stopped")
     
     async def _ensure_auth_token(self):
-        if not self._auth_token:
+        if self._auth_token:
+            return
+        # Concurrent callers (e.g. the prefetch and the API actions) share a single token request
+        async with self._auth_lock:
+            if not self._auth_token:
+                try:
+                    token_response = await self.chatbet_client.generate_token()
+                    self._auth_token = token_response.get("token")
+                    self.chatbet_client.set_auth_token(self._auth_token)
+                    logger.info("Generated new authentication token")
+                except Exception as e:
+                    logger.error(f"Error generating auth token: {e}")
+    
+    async def _prefetch_sports_data(self):
+        """Warm the auth token and fixture cache while the model is still reading the message"""
+        try:
+            await self._ensure_auth_token()
+            await self.data_service.get_fixtures_for_sport(sport_id=1)
+        except Exception as e:
+            logger.warning(f"Error prefetching sports data: {e}")
+    
+    async def _purge_expired_caches(self):
+        """Sweep expired entries periodically so keys that are never read again do not pin memory"""
+        while True:
+            await asyncio.sleep(CACHE_PURGE_INTERVAL)
+            removed = self.data_service.purge_expired() + self._response_cache.purge_expired()
+            if removed:
+                logger.debug(f"Purged {removed} expired cache entries")
+    
+    async def _get_model(self) -> genai.GenerativeModel:
+        if self._model is None:
+            async with self._model_lock:
+                if self._model is None:
+                    genai.configure(api_key=self.settings.google_ai_api_key)
+                    self._model = genai.GenerativeModel(self.settings.google_ai_model)
+                    logger.info(f"Initialized Gemini model {self.settings.google_ai_model}")
+        return self._model
+    
+    async def _generate(self, prompt: str):
+        model = await self._get_model()
+        return await model.generate_content_async(prompt)
+    
+    async def _generate_reply(
+        self,
+        prompt: str,
+        on_event: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
+    ) -> str:
+        """Generate the user-facing reply, streaming text chunks as "delta" events when a listener is given"""
+        if on_event is None:
+            response = await self._generate(prompt)
+            return response.text
+        
+        model = await self._get_model()
+        chunks = []
+        async for chunk in await model.generate_content_async(prompt, stream=True):
             try:
-                token_response = await self.chatbet_client.generate_token()
-                self._auth_token = token_response.get("token")
-                self.chatbet_client.set_auth_token(self._auth_token)
-                logger.info("Generated new authentication token")
-            except Exception as e:
-                logger.error(f"Error generating auth token: {e}")
+                text = chunk.text
+            except ValueError:
+                # Chunks without a text part (e.g. a safety-blocked or finish-only final chunk) raise on .text
+                continue
+            if text:
+                chunks.append(text)
+                await on_event("delta", {"text": text})
+        return "".join(chunks)
+    
+    def _start_background_task(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
     
     def _get_system_prompt(self) -> str:
         return PromptBuilder.get_system_prompt()
     
     async def _get_user_context(self, session_id: str) -> UserContext:
+        now = time.monotonic()
+        self._evict_idle_contexts(now)
+        
         if session_id not in self.user_contexts:
             self.user_contexts[session_id] = UserContext(session_id=session_id)
+        else:
+            self.user_contexts.move_to_end(session_id)
+        self._context_last_seen[session_id] = now
         return self.user_contexts[session_id]
     
+    def _evict_idle_contexts(self, now: float):
+        """Drop contexts not used within conversation_timeout seconds, oldest first"""
+        cutoff = now - self._conversation_timeout
+        while self.user_contexts:
+            session_id = next(iter(self.user_contexts))
+            if self._context_last_seen.get(session_id, now) > cutoff:
+                break
+            del self.user_contexts[session_id]
+            self._context_last_seen.pop(session_id, None)
+            lock = self._session_locks.get(session_id)
+            if lock is not None and not lock.locked():
+                del self._session_locks[session_id]
+            logger.info(f"Evicted idle context for session {session_id}")
+    
     def _update_user_context(self, context: UserContext, message: str, response_data: Dict):
         context.conversation_history.append({
             "timestamp": datetime.now().isoformat(),
@@ -65,26 +334,106 @@ class ChatBotService:
             "intent": response_data.get("intent")
         })
         
-        if len(context.conversation_history) > settings.max_conversation_history:
-            context.conversation_history = context.conversation_history[-settings.max_conversation_history:]
-        
         entities = response_data.get("entities", {})
         if "teams" in entities:
-            context.mentioned_teams.extend(entities["teams"])
-            context.mentioned_teams = list(set(context.mentioned_teams))
+            context.add_mentioned_teams(entities["teams"])
         
         context.last_intent = response_data.get("intent")
     
+    def _parse_model_reply(self, response_text: str) -> Dict[str, Any]:
+        try:
+            if "```json" in response_text:
+                json_match = _JSON_FENCE_RE.search(response_text)
+                if json_match:
+                    response_text = json_match.group(1)
+            
+            return orjson.loads(response_text)
+        except (orjson.JSONDecodeError, AttributeError):
+            return {
+                "intent": "general",
+                "entities": {},
+                "api_actions": [],
+                "response": response_text,
+                "needs_api_data": False,
+                "confidence": 0.8
+            }
+    
+    def _get_cached_response(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        cached = self._response_cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        logger.info("Using cached model reply")
+        return dict(cached)
+    
+    def _cache_response(self, cache_key: str, response_data: Dict[str, Any]):
+        self._response_cache.set(cache_key, dict(response_data))
+    
+    def _templated_favorite_response(self, team_odds: Dict[str, Dict], favorite_team: Optional[str]) -> Optional[str]:
+        """Canned answer when one team is clearly favored, or None to let the model phrase it"""
+        if not (self.settings.templated_favorite_responses and favorite_team):
+            return None
+        if len(team_odds) > FAVORITE_TEMPLATE_MAX_TEAMS:
+            return None
+        
+        favorite_odds = team_odds[favorite_team].get("odds")
+        closest_team = min(
+            (team for team in team_odds if team != favorite_team), key=lambda team: team_odds[team].get("odds")
+        )
+        closest_odds = team_odds[closest_team].get("odds")
+        if closest_odds - favorite_odds < FAVORITE_TEMPLATE_MIN_ODDS_GAP:
+            return None
+        
+        return random.choice(FAVORITE_TEMPLATES).format(
+            team=favorite_team, odds=favorite_odds, other_team=closest_team, other_odds=closest_odds
+        )
+    
     def _build_context_prompt(self, context: UserContext, current_message: str) -> str:
         return PromptBuilder.build_context_prompt(context, current_message)
     
     async def _execute_api_actions(self, actions: List[str], entities: Dict, context: UserContext) -> Dict[str, Any]:
         return await self.api_analyzer.execute_api_actions(actions, entities, context)
     
-    async def process_message(self, message: ChatMessage) -> ChatResponse:
+    async def process_message(
+        self,
+        message: ChatMessage,
+        on_event: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
+    ) -> ChatResponse:
         """Process user message and generate response with real data"""
+        # Anonymous messages get a fresh session instead of sharing one context (and one lock);
+        # the id is returned so the client can continue the conversation
+        session_id = message.session_id or uuid.uuid4().hex
+        # Messages of one session run one at a time so its context stays consistent
+        async with self._session_locks[session_id]:
+            response = await self._process_message(message, session_id, on_event)
+        response.session_id = session_id
+        return response
+    
+    async def stream_message(self, message: ChatMessage) -> AsyncIterator[Dict[str, Any]]:
+        """Yield intent and data events as soon as they are known, then a final done event"""
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def emit(event: str, data: Dict[str, Any]):
+            await queue.put({"event": event, "data": data})
+        
+        task = asyncio.ensure_future(self.process_message(message, on_event=emit))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
         try:
-            context = await self._get_user_context(message.session_id or "default")
+            while (event := await queue.get()) is not None:
+                yield event
+            yield {"event": "done", "data": task.result().model_dump()}
+        finally:
+            if not task.done():
+                task.cancel()
+    
+    async def _process_message(
+        self,
+        message: ChatMessage,
+        session_id: str,
+        on_event: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None
+    ) -> ChatResponse:
+        try:
+            context = await self._get_user_context(session_id)
             context.user_key = message.user_key
             
             full_prompt = self._build_context_prompt(context, message.message)
@@ -92,25 +441,27 @@ class ChatBotService:
             
             prompt = f"{system_prompt}\n\n{full_prompt}"
             
-            response = await self.model.generate_content_async(prompt)
-            response_text = response.text
+            cache_key = hashlib.sha256(prompt.encode()).hexdigest()
+            response_data = self._get_cached_response(cache_key)
             
-            try:
-                if "```json" in response_text:
-                    json_match = re.search(r'```json\n(.*?)\n```', response_text, re.DOTALL)
-                    if json_match:
-                        response_text = json_match.group(1)
+            if response_data is None:
+                # API actions need the token and sport fixtures, so fetch them while Gemini runs;
+                # skipped for greetings and chit-chat that will not use them
+                if self.api_analyzer.likely_needs_sports_data(message.message):
+                    self._start_background_task(self._prefetch_sports_data())
+                response = await self._generate(prompt)
+                response_data = self._parse_model_reply(response.text)
                 
-                response_data = json.loads(response_text)
-            except (json.JSONDecodeError, AttributeError):
-                response_data = {
-                    "intent": "general",
-                    "entities": {},
-                    "api_actions": [],
-                    "response": response_text,
-                    "needs_api_data": False,
-                    "confidence": 0.8
-                }
+                # Replies that need live API data are time-sensitive and never cached
+                if isinstance(response_data, dict) and not response_data.get("needs_api_data", False):
+                    self._cache_response(cache_key, response_data)
+            
+            if on_event:
+                await on_event("intent", {
+                    "intent": response_data.get("intent"),
+                    "entities": response_data.get("entities", {}),
+                    "confidence": response_data.get("confidence", 0.8)
+                })
             
             if response_data.get("needs_api_data", False):
                 logger.info(f"Need API data: {response_data.get('api_actions', [])}")
@@ -126,182 +477,104 @@ class ChatBotService:
                 if api_data:
                     logger.info(f"API data keys: {list(api_data.keys())}")
                 
+                if on_event and api_data and not api_data.get("error"):
+                    await on_event("data", api_data)
+                
                 if api_data and not api_data.get("error"):
                     if api_data.get("betting_recommendations"):
                         betting_recommendations = api_data.get("betting_recommendations", [])
                         if betting_recommendations:
                             top_recommendation = betting_recommendations[0]
-                            recommendations_prompt = f"""
-                            USER QUESTION: {message.message}
-                            
-                            BETTING RECOMMENDATIONS ANALYSIS:
-                            BEST RECOMMENDATION:
-                            - Match: {top_recommendation.get('match')}
-                            - Bet type: {top_recommendation.get('recommendation_type')}
-                            - Recommended option: {top_recommendation.get('option')}
-                            - Recommended odds: {top_recommendation.get('odds')}
-                            - Tournament: {top_recommendation.get('tournament')}
-                            
-                            OTHER OPTIONS:"""
-                            
-                            for rec in betting_recommendations[1:3]:
-                                recommendations_prompt += f"""
-                            - {rec.get('match')}: {rec.get('option')} (odds {rec.get('odds')}) - {rec.get('recommendation_type')}"""
-                            
-                            recommendations_prompt += f"""
-                            
-                            INSTRUCTIONS:
-                            - Respond in English with a super friendly and enthusiastic tone, like an expert buddy
-                            - Start with something like "Hey! I've got the perfect recommendation for you" or "Check out what I found!"
-                            - Present the BEST bet with excitement: "This match is awesome!" or "What a game!"
-                            - Explain the bet type in casual language: "safe bet", "value play", "interesting risk"
-                            - Mention the specific odds with enthusiasm: "Wow, those odds look great!"
-                            - Include 1-2 alternatives with phrases like "If you're feeling adventurous..." or "By the way, you also have..."
-                            - ALWAYS mention these are SIMULATED bets but in a fun way: "We're simulating the play!" or "Playing with virtual money!"
-                            - Give a responsible gambling reminder but keep the positive vibe
-                            - Maximum 5-6 sentences, full of energy
-                            - End with something like "What do you think?" or "Let me know your thoughts!"
-                            
-                            Respond ONLY with the final text, no JSON format.
-                            """
-                            enhanced_response = await self.model.generate_content_async(recommendations_prompt)
-                            response_data["response"] = enhanced_response.text
+                            parts = [RECOMMENDATIONS_HEADER.format(
+                                message=message.message,
+                                match=top_recommendation.get('match'),
+                                recommendation_type=top_recommendation.get('recommendation_type'),
+                                option=top_recommendation.get('option'),
+                                odds=top_recommendation.get('odds'),
+                                tournament=top_recommendation.get('tournament')
+                            )]
+                            parts.extend(
+                                RECOMMENDATION_LINE.format(
+                                    match=rec.get('match'),
+                                    option=rec.get('option'),
+                                    odds=rec.get('odds'),
+                                    recommendation_type=rec.get('recommendation_type')
+                                )
+                                for rec in betting_recommendations[1:3]
+                            )
+                            parts.append(RECOMMENDATIONS_INSTRUCTIONS)
+                            response_data["response"] = await self._generate_reply("".join(parts), on_event)
                             response_data["data"] = api_data
                     elif api_data.get("simulation_options"):
                         simulation_options = api_data.get("simulation_options", [])
                         bet_amount = api_data.get("bet_amount", 0)
                         
                         if simulation_options:
-                            simulation_prompt = f"""
-                            USER QUESTION: {message.message}
-                            
-                            BET SIMULATION WITH ${bet_amount}:
-                            """
-                            
-                            for option in simulation_options[:5]:
-                                simulation_prompt += f"""
-                            - {option.get('match')}: {option.get('bet_option')} (odds {option.get('odds')}) → Profit ${option.get('profit')} (Total ${option.get('potential_return')})"""
-                            
-                            simulation_prompt += f"""
-                            
-                            INSTRUCTIONS:
-                            - Respond in English with tons of excitement, like a buddy who loves betting
-                            - Start with something like "Hey! With ${bet_amount} you've got some awesome options" or "That's a great amount to play with!"
-                            - Explain the available options with enthusiasm: "Check out these spectacular plays"
-                            - Mention the potential profits with excitement: "You could win up to $X!" or "Wow, that profit looks amazing!"
-                            - Highlight the best options: "My favorite is this one", "If it were me, I'd go for..."
-                            - ALWAYS emphasize these are simulations in a fun way: "We're playing with Monopoly money!" or "Just for fun, but how exciting!"
-                            - Include a responsible gambling reminder but keep the positive energy
-                            - Maximum 6-8 sentences, full of energy
-                            - End by asking their opinion: "Which one catches your eye?" or "Which would you go for?"
-                            
-                            Respond ONLY with the final text, no JSON format.
-                            """
-                            enhanced_response = await self.model.generate_content_async(simulation_prompt)
-                            response_data["response"] = enhanced_response.text
+                            parts = [SIMULATION_HEADER.format(message=message.message, bet_amount=bet_amount)]
+                            parts.extend(
+                                SIMULATION_LINE.format(
+                                    match=option.get('match'),
+                                    bet_option=option.get('bet_option'),
+                                    odds=option.get('odds'),
+                                    profit=option.get('profit'),
+                                    potential_return=option.get('potential_return')
+                                )
+                                for option in simulation_options[:5]
+                            )
+                            parts.append(SIMULATION_INSTRUCTIONS.format(bet_amount=bet_amount))
+                            response_data["response"] = await self._generate_reply("".join(parts), on_event)
                             response_data["data"] = api_data
                     elif api_data.get("competitive_matches"):
                         competitive_matches = api_data.get("competitive_matches", [])
                         if competitive_matches:
                             most_competitive = competitive_matches[0]
-                            competitive_prompt = f"""
-                            USER QUESTION: {message.message}
-                            
-                            MOST COMPETITIVE MATCHES ANALYSIS:
-                            MOST COMPETITIVE MATCH:
-                            - Match: {most_competitive.get('fixture', {}).get('homeCompetitorName', {}).get('en', '')} vs {most_competitive.get('fixture', {}).get('awayCompetitorName', {}).get('en', '')}
-                            - Home odds: {most_competitive.get('home_win_odds')}
-                            - Away odds: {most_competitive.get('away_win_odds')}
-                            - Draw odds: {most_competitive.get('draw_odds')}
-                            - Competitiveness score: {most_competitive.get('competitiveness_score', 0):.3f}
-                            
-                            OTHER COMPETITIVE MATCHES:"""
-                            
-                            for match in competitive_matches[1:3]:
-                                home_team = match.get('fixture', {}).get('homeCompetitorName', {}).get('en', '')
-                                away_team = match.get('fixture', {}).get('awayCompetitorName', {}).get('en', '')
-                                competitive_prompt += f"""
-                            - {home_team} vs {away_team} (score: {match.get('competitiveness_score', 0):.3f})"""
-                            
-                            competitive_prompt += f"""
-                            
-                            INSTRUCTIONS:
-                            - Respond in English with tons of excitement, like a passionate sports fan
-                            - Start with something like "Wow! I've got the most balanced match for you" or "Wait till you see this, it's going to be epic!"
-                            - Highlight the MOST COMPETITIVE match with enthusiasm: "This game is going to be a nail-biter!"
-                            - Mention the teams and main odds with excitement: "The odds are super close!"
-                            - Explain why it's competitive in an exciting way: "It's so evenly matched that anything could happen!"
-                            - Briefly mention 1-2 other competitive matches: "And if that's not enough, check out these too..."
-                            - Use sporty language: "thriller", "super close", "edge-of-your-seat", "intense"
-                            - Maximum 4-5 sentences, packed with energy
-                            - End with anticipation: "Get ready for a show!" or "This is going to be epic!"
-                            
-                            Respond ONLY with the final text, no JSON format.
-                            """
-                            enhanced_response = await self.model.generate_content_async(competitive_prompt)
-                            response_data["response"] = enhanced_response.text
+                            parts = [COMPETITIVE_HEADER.format(
+                                message=message.message,
+                                home_team=most_competitive.get('fixture', {}).get('homeCompetitorName', {}).get('en', ''),
+                                away_team=most_competitive.get('fixture', {}).get('awayCompetitorName', {}).get('en', ''),
+                                home_win_odds=most_competitive.get('home_win_odds'),
+                                away_win_odds=most_competitive.get('away_win_odds'),
+                                draw_odds=most_competitive.get('draw_odds'),
+                                score=most_competitive.get('competitiveness_score', 0)
+                            )]
+                            parts.extend(
+                                COMPETITIVE_LINE.format(
+                                    home_team=match.get('fixture', {}).get('homeCompetitorName', {}).get('en', ''),
+                                    away_team=match.get('fixture', {}).get('awayCompetitorName', {}).get('en', ''),
+                                    score=match.get('competitiveness_score', 0)
+                                )
+                                for match in competitive_matches[1:3]
+                            )
+                            parts.append(COMPETITIVE_INSTRUCTIONS)
+                            response_data["response"] = await self._generate_reply("".join(parts), on_event)
                             response_data["data"] = api_data
                     elif api_data.get("team_odds") and api_data.get("comparison_type") == "favorite_teams":
                         team_odds = api_data.get("team_odds", {})
                         favorite_team = api_data.get("favorite_team")
                         
-                        comparison_prompt = f"""
-                        USER QUESTION: {message.message}
-                        
-                        TEAMS COMPARISON BASED ON ODDS:
-                        """
-                        for team, data in team_odds.items():
-                            comparison_prompt += f"""
-                        - {team}: odds {data.get('odds')} (in {data.get('match')})"""
-                        
-                        if favorite_team:
-                            comparison_prompt += f"""
-                        
-                        FAVORITE IDENTIFIED: {favorite_team} with odds {team_odds[favorite_team].get('odds')}
-                        """
-                        
-                        comparison_prompt += f"""
-                        
-                        INSTRUCTIONS:
-                        - Respond in English with a super friendly and enthusiastic tone, like an expert buddy
-                        - Start with excitement: "Hey! I checked the odds and here's what I found" or "Wow, this is interesting!"
-                        - DIRECTLY identify which team has the LOWEST odds (the favorite)
-                        - Mention the specific odds with excitement: "Check out these odds!"
-                        - Explain simply that lower odds = higher probability
-                        - Use energetic language: "clear favorite", "the bookmakers are sure", "no doubt about it"
-                        - Add emotional context: "It's super obvious!" or "The odds don't lie!"
-                        - Maximum 2-3 sentences, full of energy
-                        - DO NOT mention date details
-                        - End with confidence: "There's your answer!" or "Crystal clear!"
-                        
-                        Respond ONLY with the final text, no JSON format.
-                        """
-                        enhanced_response = await self.model.generate_content_async(comparison_prompt)
-                        response_data["response"] = enhanced_response.text
+                        templated_response = self._templated_favorite_response(team_odds, favorite_team)
+                        if templated_response:
+                            response_data["response"] = templated_response
+                        else:
+                            parts = [COMPARISON_HEADER.format(message=message.message)]
+                            parts.extend(
+                                COMPARISON_LINE.format(team=team, odds=data.get('odds'), match=data.get('match'))
+                                for team, data in team_odds.items()
+                            )
+                            if favorite_team:
+                                parts.append(COMPARISON_FAVORITE.format(
+                                    team=favorite_team, odds=team_odds[favorite_team].get('odds')
+                                ))
+                            parts.append(COMPARISON_INSTRUCTIONS)
+                            response_data["response"] = await self._generate_reply("".join(parts), on_event)
                         response_data["data"] = api_data
                     else:
-                        enhanced_prompt = f"""
-                        REAL DATA OBTAINED FROM CHATBET API:
-                        {json.dumps(api_data, indent=2, ensure_ascii=False)}
-                        
-                        USER'S ORIGINAL MESSAGE: {message.message}
-                        
-                        INSTRUCTIONS:
-                        - Hey! Use ONLY the real data provided above 
-                        - Respond in a super natural and friendly way in English, like a buddy who's passionate about betting
-                        - If it's about matches, mention specific teams, dates, and tournaments with excitement 
-                        - If it's about odds, mention the exact values with enthusiasm 
-                        - If it's about balance, mention the exact available amount with energy 
-                        - For bet simulations, calculate potential winnings and get excited 
-                        - ALWAYS clarify that the bets are SIMULATED but do it in a fun, positive way 
-                        - Use expressions like: "Hey!", "Check this out!", "Awesome!", "That's fire!", "So cool!", "This is wild!"
-                        
-                        
-                        Respond ONLY with the final friendly text, no JSON format.
-                        """
+                        enhanced_prompt = API_DATA_PROMPT.format(
+                            api_data=orjson.dumps(api_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode(),
+                            message=message.message
+                        )
                         
-                        enhanced_response = await self.model.generate_content_async(enhanced_prompt)
-                        response_data["response"] = enhanced_response.text
+                        response_data["response"] = await self._generate_reply(enhanced_prompt, on_event)
                         response_data["data"] = api_data
                 else:
                     response_data["response"] = "Sorry, I couldn't get the requested information at this moment. Can you try with another query?"
@@ -1,13 +1,119 @@
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from app.services.cache import AsyncTTLCache
 from app.services.chatbet_client import ChatBetClient
 from app.models.schemas import Sport, Tournament, Fixture, OddsData, UserBalance
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+from functools import lru_cache
 import re
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on simultaneous odds requests issued by get_odds_for_fixtures
+ODDS_FETCH_CONCURRENCY = 8
+
+# Failed API reads are remembered this many seconds so an outage is not retried on every message
+NEGATIVE_CACHE_TTL = 10
+_NEGATIVE = object()
+
+# Shorter team queries ("", "a", "fc") are substrings of most fixtures, so they are ignored rather than matched
+MIN_TEAM_NAME_LENGTH = 3
+
+
+@lru_cache(maxsize=256)
+def _team_matcher(team_names_lower: Tuple[str, ...]) -> "re.Pattern[str]":
+    """Single compiled alternation matching any of the (lowercased) team names"""
+    return re.compile("|".join(map(re.escape, team_names_lower)))
+
+
+# (odds_data section, selection key, bet_type, fallback name) for each entry extract_best_odds emits
+_BEST_ODDS_SPECS = (
+    ("result", "homeTeam", "home_win", "Home"),
+    ("result", "tie", "draw", "Draw"),
+    ("result", "awayTeam", "away_win", "Away"),
+    ("over_under", "over", "over", "Over"),
+)
+
+_MONTH_DAY_RE = re.compile(r"^(\d{2})-(\d{2})$")
+
+
+@lru_cache(maxsize=1)
+def _date_aliases(today_ordinal: int) -> Dict[str, List[str]]:
+    """MM-DD strings for every relative date entity, computed once per calendar day"""
+    today = date.fromordinal(today_ordinal)
+    
+    days_ahead = 6 - today.weekday()
+    if days_ahead <= 0:
+        days_ahead += 7
+    next_sunday = today + timedelta(days_ahead)
+    
+    days_to_saturday = 5 - today.weekday()
+    if days_to_saturday <= 0:
+        days_to_saturday += 7
+    saturday = today + timedelta(days=days_to_saturday)
+    sunday = saturday + timedelta(days=1)
+    weekend = [saturday.strftime("%m-%d"), sunday.strftime("%m-%d")]
+    
+    return {
+        "today": [today.strftime("%m-%d")],
+        "tomorrow": [(today + timedelta(days=1)).strftime("%m-%d")],
+        "sunday": [next_sunday.strftime("%m-%d")],
+        "weekend": weekend,
+        "fin de semana": weekend,
+    }
+
+
+def _fixture_team_names(fixture: Dict[str, Any]) -> Tuple[str, str]:
+    """Lowercased (home, away) names from either fixture payload shape"""
+    home_team = ""
+    away_team = ""
+    
+    if "homeCompetitor" in fixture:
+        home_team = fixture.get("homeCompetitor", {}).get("name", "").lower()
+        away_team = fixture.get("awayCompetitor", {}).get("name", "").lower()
+    
+    if not home_team and "home_team_data" in fixture:
+        home_team = fixture.get("home_team_data", {}).get("name", {}).get("en", "").lower()
+        away_team = fixture.get("away_team_data", {}).get("name", {}).get("en", "").lower()
+    
+    return home_team, away_team
+
+
+def _iso_month_day(start_time: Any) -> Optional[str]:
+    if isinstance(start_time, str) and len(start_time) >= 10 and start_time[4] == "-" and start_time[7] == "-":
+        return start_time[5:10]
+    return None
+
+
+class FixtureBatch(list):
+    """
+    Cached fixture list carrying the fields the filters read as parallel columns.
+    
+    Built once when fixtures are loaded so repeated team/date queries against the
+    cached list skip the nested dict lookups; slices and filter results are plain lists.
+    """
+    
+    def __init__(self, fixtures: List[Dict[str, Any]]):
+        super().__init__(fixtures)
+        self.team_names: List[Optional[Tuple[str, str]]] = []
+        self.start_times: List[Any] = []
+        # "MM-DD" sliced from ISO "YYYY-MM-DDTHH:MM..." start times; None when startTime has another shape
+        self.start_days: List[Optional[str]] = []
+        
+        for fixture in self:
+            try:
+                self.team_names.append(_fixture_team_names(fixture))
+            except (AttributeError, KeyError, TypeError):
+                self.team_names.append(None)
+            start_time = fixture.get("startTime", "") if isinstance(fixture, dict) else None
+            self.start_times.append(start_time)
+            self.start_days.append(_iso_month_day(start_time))
+        
+        dropped = self.team_names.count(None)
+        if dropped:
+            logger.warning("Skipping %s of %s fixtures with malformed team data in team search", dropped, len(self))
+
 
 class DataService:
     """
@@ -24,8 +130,8 @@ class DataService:
     def __init__(self, chatbet_client: ChatBetClient):
         self.client = chatbet_client
         
-        self._cache: Dict[str, Dict[str, Any]] = {}
-        self._cache_expiry: Dict[str, datetime] = {}
+        self._cache = AsyncTTLCache(maxsize=2048)
+        self.negative_cache_hits = 0
         
         self.cache_durations = {
             "sports": 60,
@@ -35,224 +141,288 @@ class DataService:
             "user_balance": 5,
         }
     
-    def _is_cache_valid(self, key: str) -> bool:
-        if key not in self._cache_expiry:
-            return False
-        return datetime.now() < self._cache_expiry[key]
+    def _ttl(self, cache_type: str) -> float:
+        return self.cache_durations.get(cache_type, 10) * 60
     
     def _set_cache(self, key: str, data: Any, cache_type: str) -> None:
-        self._cache[key] = data
-        expiry_minutes = self.cache_durations.get(cache_type, 10)
-        self._cache_expiry[key] = datetime.now() + timedelta(minutes=expiry_minutes)
+        self._cache.set(key, data, self._ttl(cache_type))
+    
+    def _get_cached(self, key: str, empty: Any) -> Any:
+        """Cached value for key, empty while a recent failure is negatively cached, else None"""
+        cached = self._cache.get(key)
+        if cached is _NEGATIVE:
+            self.negative_cache_hits += 1
+            return empty
+        return cached
     
     async def get_sports(self) -> List[Dict[str, Any]]:
         cache_key = "all_sports"
         
-        if self._is_cache_valid(cache_key):
-            logger.info("Using cached sports data")
-            return self._cache[cache_key]
+        cached = self._get_cached(cache_key, [])
+        if cached is not None:
+            logger.debug("Using cached sports data")
+            return cached
         
         try:
-            sports_data = await self.client.get_sports()
-            self._set_cache(cache_key, sports_data, "sports")
-            logger.info(f"Fetched {len(sports_data)} sports from API")
+            sports_data = await self._cache.get_or_set(cache_key, self.client.get_sports, self._ttl("sports"))
+            logger.info("Fetched %s sports from API", len(sports_data))
             return sports_data
         except Exception as e:
-            logger.error(f"Error fetching sports: {e}")
+            logger.error("Error fetching sports: %s", e)
+            self._cache.set(cache_key, _NEGATIVE, NEGATIVE_CACHE_TTL)
             return []
     
     async def get_all_tournaments(self) -> List[Dict[str, Any]]:
         cache_key = "all_tournaments"
         
-        if self._is_cache_valid(cache_key):
-            logger.info("Using cached tournaments data")
-            return self._cache[cache_key]
+        cached = self._get_cached(cache_key, [])
+        if cached is not None:
+            logger.debug("Using cached tournaments data")
+            return cached
         
         try:
-            tournaments_data = await self.client.get_all_tournaments()
-            self._set_cache(cache_key, tournaments_data, "tournaments")
-            logger.info(f"Fetched tournaments for {len(tournaments_data)} sports")
+            tournaments_data = await self._cache.get_or_set(
+                cache_key, self.client.get_all_tournaments, self._ttl("tournaments")
+            )
+            logger.info("Fetched tournaments for %s sports", len(tournaments_data))
             return tournaments_data
         except Exception as e:
-            logger.error(f"Error fetching tournaments: {e}")
+            logger.error("Error fetching tournaments: %s", e)
+            self._cache.set(cache_key, _NEGATIVE, NEGATIVE_CACHE_TTL)
             return []
     
     async def get_fixtures_for_sport(self, sport_id: int = 1) -> List[Dict[str, Any]]:
         cache_key = f"fixtures_sport_{sport_id}"
         
-        if self._is_cache_valid(cache_key):
-            logger.info(f"Using cached fixtures for sport {sport_id}")
-            return self._cache[cache_key]
+        cached = self._get_cached(cache_key, [])
+        if cached is not None:
+            logger.debug("Using cached fixtures for sport %s", sport_id)
+            return cached
+        
+        async def load_fixtures() -> List[Dict[str, Any]]:
+            return FixtureBatch(await self.client.get_sports_fixtures(sport_id=sport_id))
         
         try:
-            fixtures_data = await self.client.get_sports_fixtures(sport_id=sport_id)
-            if fixtures_data and isinstance(fixtures_data[0], dict) and "totalResults" in fixtures_data[0]:
-                fixtures_data = fixtures_data[1:]
-            
-            self._set_cache(cache_key, fixtures_data, "fixtures")
-            logger.info(f"Fetched {len(fixtures_data)} fixtures for sport {sport_id}")
+            fixtures_data = await self._cache.get_or_set(cache_key, load_fixtures, self._ttl("fixtures"))
+            logger.info("Fetched %s fixtures for sport %s", len(fixtures_data), sport_id)
             return fixtures_data
         except Exception as e:
-            logger.error(f"Error fetching fixtures for sport {sport_id}: {e}")
+            logger.error("Error fetching fixtures for sport %s: %s", sport_id, e)
+            self._cache.set(cache_key, _NEGATIVE, NEGATIVE_CACHE_TTL)
             return []
     
     async def get_odds_for_fixture(self, sport_id: int, tournament_id: int, fixture_id: int) -> Dict[str, Any]:
         cache_key = f"odds_{sport_id}_{tournament_id}_{fixture_id}"
         
-        if self._is_cache_valid(cache_key):
-            logger.info(f"Using cached odds for fixture {fixture_id}")
-            return self._cache[cache_key]
+        cached = self._get_cached(cache_key, {})
+        if cached is not None:
+            logger.debug("Using cached odds for fixture %s", fixture_id)
+            return cached
         
         try:
-            odds_data = await self.client.get_odds(
-                sport_id=sport_id,
-                tournament_id=tournament_id,
-                fixture_id=fixture_id
+            odds_data = await self._cache.get_or_set(
+                cache_key,
+                lambda: self.client.get_odds(
+                    sport_id=sport_id,
+                    tournament_id=tournament_id,
+                    fixture_id=fixture_id
+                ),
+                self._ttl("odds")
             )
-            self._set_cache(cache_key, odds_data, "odds")
-            logger.info(f"Fetched odds for fixture {fixture_id}")
+            logger.info("Fetched odds for fixture %s", fixture_id)
             return odds_data
         except Exception as e:
-            logger.error(f"Error fetching odds for fixture {fixture_id}: {e}")
+            logger.error("Error fetching odds for fixture %s: %s", fixture_id, e)
+            self._cache.set(cache_key, _NEGATIVE, NEGATIVE_CACHE_TTL)
             return {}
     
+    async def get_odds_for_fixtures(
+        self, keys: List[Tuple[int, int, int]]
+    ) -> Dict[Tuple[int, int, int], Dict[str, Any]]:
+        """Odds for many (sport_id, tournament_id, fixture_id) keys: cache hits first, misses fetched concurrently"""
+        odds_by_key = {}
+        misses = []
+        for key in dict.fromkeys(keys):
+            cached = self._get_cached(f"odds_{key[0]}_{key[1]}_{key[2]}", {})
+            if cached is not None:
+                odds_by_key[key] = cached
+            else:
+                misses.append(key)
+        
+        if misses:
+            semaphore = asyncio.Semaphore(ODDS_FETCH_CONCURRENCY)
+            
+            async def fetch(key: Tuple[int, int, int]) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.get_odds_for_fixture(*key)
+            
+            results = await asyncio.gather(*(fetch(key) for key in misses))
+            odds_by_key.update(zip(misses, results))
+            logger.info("Odds for %s fixtures (%s fetched from API)", len(odds_by_key), len(misses))
+        
+        return odds_by_key
+    
+    def purge_expired(self) -> int:
+        return self._cache.purge_expired()
+    
     async def get_user_balance(self, user_id: str, user_key: str, token: str) -> Dict[str, Any]:
         cache_key = f"balance_{user_id}"
         
-        if self._is_cache_valid(cache_key):
-            logger.info(f"Using cached balance for user {user_id}")
-            return self._cache[cache_key]
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Using cached balance for user %s", user_id)
+            return cached
         
         try:
-            balance_data = await self.client.get_user_balance(user_id, user_key, token)
-            self._set_cache(cache_key, balance_data, "user_balance")
-            logger.info(f"Fetched balance for user {user_id}: ${balance_data.get('money', 0)}")
+            balance_data = await self._cache.get_or_set(
+                cache_key,
+                lambda: self.client.get_user_balance(user_id, user_key, token),
+                self._ttl("user_balance")
+            )
+            logger.info("Fetched balance for user %s: $%s", user_id, balance_data.get('money', 0))
             return balance_data
         except Exception as e:
-            logger.error(f"Error fetching balance for user {user_id}: {e}")
+            logger.error("Error fetching balance for user %s: %s", user_id, e)
             return {}
     
-    def find_team_in_fixtures(self, team_name: str, fixtures: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        team_name_lower = team_name.lower()
+    def find_team_in_fixtures(
+        self, team_name: str, fixtures: List[Dict[str, Any]], limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        return self.find_fixtures_by_teams([team_name], fixtures, limit=limit)
+    
+    def find_fixtures_by_teams(
+        self, team_names: List[str], fixtures: List[Dict[str, Any]], limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Return fixtures involving any of the given teams in a single pass, stopping after limit matches"""
+        team_names_lower = tuple(
+            team_name_lower for team_name_lower in (team_name.strip().lower() for team_name in team_names)
+            if len(team_name_lower) >= MIN_TEAM_NAME_LENGTH
+        )
+        if not team_names_lower:
+            return []
+        
+        matcher = _team_matcher(team_names_lower)
+        # NUL never occurs in names, so a home/away substring of this blob lies within one team name
+        team_names_blob = "\x00".join(team_names_lower)
         matching_fixtures = []
         
+        for fixture, (home_team, away_team) in self._iter_team_names(fixtures):
+            if (matcher.search(f"{home_team}\x00{away_team}") or
+                (home_team and home_team in team_names_blob) or (away_team and away_team in team_names_blob)):
+                matching_fixtures.append(fixture)
+                
+                if limit is not None and len(matching_fixtures) >= limit:
+                    break
+        
+        return matching_fixtures
+    
+    def _iter_team_names(self, fixtures: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Tuple[str, str]]]:
+        """Yield (fixture, (home, away)), reading the precomputed column when given a FixtureBatch"""
+        if isinstance(fixtures, FixtureBatch):
+            for fixture, team_names in zip(fixtures, fixtures.team_names):
+                if team_names is not None:
+                    yield fixture, team_names
+            return
+        
         for fixture in fixtures:
             try:
-                home_team = ""
-                away_team = ""
-                
-                if "homeCompetitor" in fixture:
-                    home_team = fixture.get("homeCompetitor", {}).get("name", "").lower()
-                    away_team = fixture.get("awayCompetitor", {}).get("name", "").lower()
-
-                if not home_team and "home_team_data" in fixture:
-                    home_team = fixture.get("home_team_data", {}).get("name", {}).get("en", "").lower()
-                    away_team = fixture.get("away_team_data", {}).get("name", {}).get("en", "").lower()
-
-                if (team_name_lower in home_team or team_name_lower in away_team or
-                    home_team in team_name_lower or away_team in team_name_lower):
-                    matching_fixtures.append(fixture)
-                    
+                team_names = _fixture_team_names(fixture)
             except (AttributeError, KeyError) as e:
-                logger.warning(f"Error processing fixture for team search: {e}")
+                logger.warning("Error processing fixture for team search: %s", e)
                 continue
+            yield fixture, team_names
+    
+    def _resolve_target_dates(self, target_date: str) -> List[str]:
+        """Translate a date entity ("today", "weekend", "08-15", ...) into MM-DD strings"""
+        aliases = _date_aliases(date.today().toordinal())
+        target_dates = aliases.get(target_date.lower())
+        if target_dates is not None:
+            if target_dates is aliases["weekend"]:
+                logger.info("Weekend dates: %s", target_dates)
+            return list(target_dates)
         
-        return matching_fixtures
+        date_to_use = target_date
+        match = _MONTH_DAY_RE.match(target_date)
+        if match and int(match.group(1)) > 12:
+            date_to_use = f"{match.group(2)}-{match.group(1)}"
+        
+        return [date_to_use]
+    
+    def find_fixtures_by_date(
+        self, fixtures: List[Dict[str, Any]], target_date: str, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        return self.find_fixtures_by_dates(fixtures, [target_date], limit=limit)
     
-    def find_fixtures_by_date(self, fixtures: List[Dict[str, Any]], target_date: str) -> List[Dict[str, Any]]:
-        today = datetime.now()
-        target_dates = []
+    def find_fixtures_by_dates(
+        self, fixtures: List[Dict[str, Any]], target_dates: List[str], limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Return fixtures starting on any of the given date entities in a single pass, stopping after limit matches"""
+        wanted_dates = []
+        for target_date in target_dates:
+            for day in self._resolve_target_dates(target_date):
+                if day not in wanted_dates:
+                    wanted_dates.append(day)
         
-        if target_date.lower() == "today":
-            target_dates = [today.strftime("%m-%d")]
-        elif target_date.lower() == "tomorrow":
-            tomorrow = today + timedelta(days=1)
-            target_dates = [tomorrow.strftime("%m-%d")]
-        elif target_date.lower() == "sunday":
-
-            days_ahead = 6 - today.weekday()
-            if days_ahead <= 0:
-                days_ahead += 7
-            next_sunday = today + timedelta(days_ahead)
-            target_dates = [next_sunday.strftime("%m-%d")]
-        elif target_date.lower() in ["weekend", "fin de semana"]:
-            days_to_saturday = 5 - today.weekday()
-            if days_to_saturday <= 0:
-                days_to_saturday += 7
-            saturday = today + timedelta(days=days_to_saturday)
-            sunday = saturday + timedelta(days=1)
-            target_dates = [saturday.strftime("%m-%d"), sunday.strftime("%m-%d")]
-            logger.info(f"Weekend dates: {target_dates}")
+        if isinstance(fixtures, FixtureBatch):
+            rows = zip(fixtures, fixtures.start_times, fixtures.start_days)
         else:
-            date_to_use = target_date
-            if "-" in target_date and len(target_date) == 5:
-                parts = target_date.split("-")
-                if len(parts) == 2 and len(parts[0]) == 2 and len(parts[1]) == 2:
-                    if int(parts[0]) > 12:
-                        date_to_use = f"{parts[1]}-{parts[0]}"
-            target_dates = [date_to_use]
+            rows = (
+                (fixture, fixture.get("startTime", "") if isinstance(fixture, dict) else None, None)
+                for fixture in fixtures
+            )
+        
+        # For ISO start times an "MM-DD" date can only occur at [5:10], so a set lookup replaces the substring scan
+        wanted_days = set(wanted_dates) if all(_MONTH_DAY_RE.match(day) for day in wanted_dates) else None
         
         matching_fixtures = []
-        for fixture in fixtures:
-            try:
-                start_time = fixture.get("startTime", "")
-                for date in target_dates:
-                    if date in start_time:
-                        matching_fixtures.append(fixture)
-                        break
-            except (AttributeError, KeyError):
+        for fixture, start_time, start_day in rows:
+            if start_time is None:
                 continue
+            if start_day is not None and wanted_days is not None:
+                matched = start_day in wanted_days
+            else:
+                matched = any(day in start_time for day in wanted_dates)
+            
+            if matched:
+                matching_fixtures.append(fixture)
+                if limit is not None and len(matching_fixtures) >= limit:
+                    break
         
-        logger.info(f"Found {len(matching_fixtures)} fixtures for date(s) {target_dates}")
+        logger.info("Found %s fixtures for date(s) %s", len(matching_fixtures), wanted_dates)
         return matching_fixtures
     
+    def filter_fixtures(self, fixtures: List[Dict[str, Any]], entities: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Narrow fixtures to the teams and dates named in the extracted entities"""
+        if entities.get("teams"):
+            fixtures = self.find_fixtures_by_teams(entities["teams"], fixtures)
+        
+        if entities.get("dates"):
+            fixtures = self.find_fixtures_by_dates(fixtures, entities["dates"])
+        
+        return fixtures
+    
     def extract_best_odds(self, odds_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         if not odds_data or "result" not in odds_data:
             return []
         
         best_odds = []
-        result_odds = odds_data["result"]
-        
-        if "homeTeam" in result_odds:
-            home_odds = result_odds["homeTeam"]
-            best_odds.append({
-                "bet_type": "home_win",
-                "team": home_odds.get("name", "Home"),
-                "odds": home_odds.get("odds", 0),
-                "bet_id": home_odds.get("betId", "")
-            })
-        
-        if "tie" in result_odds:
-            draw_odds = result_odds["tie"]
-            best_odds.append({
-                "bet_type": "draw",
-                "team": draw_odds.get("name", "Draw"),
-                "odds": draw_odds.get("odds", 0),
-                "bet_id": draw_odds.get("betId", "")
-            })
-        
-        if "awayTeam" in result_odds:
-            away_odds = result_odds["awayTeam"]
-            best_odds.append({
-                "bet_type": "away_win",
-                "team": away_odds.get("name", "Away"),
-                "odds": away_odds.get("odds", 0),
-                "bet_id": away_odds.get("betId", "")
-            })
-        
-        if "over_under" in odds_data:
-            over_under = odds_data["over_under"]
-            if "over" in over_under:
-                over_odds = over_under["over"]
+        for section, key, bet_type, default_name in _BEST_ODDS_SPECS:
+            odds = odds_data.get(section)
+            if odds and key in odds:
+                odd = odds[key]
                 best_odds.append({
-                    "bet_type": "over",
-                    "team": over_odds.get("name", "Over"),
-                    "odds": over_odds.get("odds", 0),
-                    "bet_id": over_odds.get("betId", "")
+                    "bet_type": bet_type,
+                    "team": odd.get("name", default_name),
+                    "odds": odd.get("odds", 0),
+                    "bet_id": odd.get("betId", "")
                 })
         
         return best_odds
     
+    def extract_main_odds_map(self, extracted_odds: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Map bet_type to odds in one pass, e.g. {"home_win": 1.8, "draw": 3.4, "away_win": 4.2}"""
+        return {odd.get("bet_type"): odd.get("odds") for odd in extracted_odds}
+    
     def format_fixture_summary(self, fixture: Dict[str, Any]) -> str:
         try:
             home_team = fixture.get("homeCompetitor", {}).get("name", "Team A")
@@ -0,0 +1,83 @@
+import pytest
+
+from app.ai.analyzers import APIAnalyzer
+from app.services.data_service import DataService
+
+
+class FakeChatBetClient:
+    """Records odds requests and answers them from a {(sport_id, tournament_id, fixture_id): odds} table"""
+
+    def __init__(self, odds_by_key, fixtures=()):
+        self.odds_by_key = odds_by_key
+        self.fixtures = list(fixtures)
+        self.odds_requests = []
+
+    async def get_sports_fixtures(self, sport_id):
+        return list(self.fixtures)
+
+    async def get_odds(self, sport_id, tournament_id, fixture_id):
+        self.odds_requests.append((sport_id, tournament_id, fixture_id))
+        return self.odds_by_key.get((sport_id, tournament_id, fixture_id), {})
+
+
+async def _noop():
+    pass
+
+
+def _fixture(fixture_id, home, away, tournament_id=566):
+    return {
+        "id": fixture_id,
+        "tournament_id": tournament_id,
+        "homeCompetitorName": {"en": home},
+        "awayCompetitorName": {"en": away},
+        "tournament_name": {"en": "La Liga"},
+        "startTime": "2026-03-01T18:00:00Z",
+    }
+
+
+ODDS = {
+    "status": "active",
+    "result": {
+        "homeTeam": {"name": "Barcelona", "odds": 1.8, "betId": "h"},
+        "tie": {"name": "Draw", "odds": 3.6, "betId": "d"},
+        "awayTeam": {"name": "Real Madrid", "odds": 4.2, "betId": "a"},
+    },
+}
+
+
+@pytest.mark.asyncio
+async def test_fetch_fixture_odds_requests_full_odds_key():
+    client = FakeChatBetClient({(1, 566, 100): ODDS})
+    analyzer = APIAnalyzer(DataService(client), _noop)
+    fixtures = [_fixture(100, "Barcelona", "Real Madrid"), _fixture(101, "Inter", "Roma", tournament_id=None)]
+
+    fixture_odds = await analyzer._fetch_fixture_odds(fixtures)
+
+    assert client.odds_requests == [(1, 566, 100)]
+    assert fixture_odds == [(fixtures[0], ODDS)]
+
+
+@pytest.mark.asyncio
+async def test_competitive_analysis_reads_main_odds():
+    fixtures = [_fixture(100, "Barcelona", "Real Madrid"), _fixture(101, "Inter", "Roma")]
+    client = FakeChatBetClient({(1, 566, 100): ODDS}, fixtures)
+    analyzer = APIAnalyzer(DataService(client), _noop)
+
+    api_data = await analyzer.execute_api_actions(
+        ["get_odds"], {"_original_message": "which is the most competitive match?"}, None
+    )
+
+    most_competitive = api_data["most_competitive"]
+    assert most_competitive["fixture"]["id"] == 100
+    assert (most_competitive["home_win_odds"], most_competitive["draw_odds"], most_competitive["away_win_odds"]) == (1.8, 3.6, 4.2)
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("Hi, how are you?", False),
+    ("thanks!", False),
+    ("What are the odds for Barcelona vs Real Madrid?", True),
+    ("Who is the favorite between Inter and Roma?", True),
+    ("partidos de mañana", True),
+])
+def test_likely_needs_sports_data(message, expected):
+    assert APIAnalyzer(None, _noop).likely_needs_sports_data(message) is expected
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from app.services.data_service import ODDS_FETCH_CONCURRENCY, DataService
+
+
+class SlowOddsClient:
+    """Odds client that tracks how many get_odds calls are in flight at once"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_odds(self, sport_id, tournament_id, fixture_id):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return {"result": {"homeTeam": {"odds": fixture_id}}}
+
+
+@pytest.mark.asyncio
+async def test_get_odds_for_fixtures_bounds_concurrency():
+    client = SlowOddsClient()
+    keys = [(1, 566, fixture_id) for fixture_id in range(3 * ODDS_FETCH_CONCURRENCY)]
+
+    odds_by_key = await DataService(client).get_odds_for_fixtures(keys)
+
+    assert client.max_in_flight == ODDS_FETCH_CONCURRENCY
+    assert odds_by_key[(1, 566, 5)] == {"result": {"homeTeam": {"odds": 5}}}
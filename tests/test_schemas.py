@@ -0,0 +1,11 @@
+from app.models.schemas import UserContext
+
+
+def test_mentioned_teams_keep_first_mention_order():
+    context = UserContext(session_id="s1")
+
+    context.add_mentioned_teams(["Real Madrid", "Barcelona"])
+    context.add_mentioned_teams(["Barcelona", "Arsenal", "Real Madrid"])
+
+    assert context.mentioned_teams == ["Real Madrid", "Barcelona", "Arsenal"]
+    assert context.mentioned_teams_joined == "Real Madrid, Barcelona, Arsenal"